@@ -0,0 +1,420 @@
+import argparse
+import importlib
+import json
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+from profiling import StageTimer
+from rtspv2 import RealTimeDetector
+
+# Benchmark Replay Offline
+
+# Memutar ulang file video atau folder gambar melalui pipeline RealTimeDetector yang sama persis
+# (motion gate, ROI, inferensi batch, tracking, _process_detections, antrian notifikasi, penyimpanan).
+# FrameGrabber setiap kamera diganti ReplaySource yang membaca dari file:
+#   'max'      = secepat mungkin, tanpa ada frame yang dibuang (mengukur throughput maksimum).
+#   'realtime' = sesuai FPS rekaman, frame lama dibuang seperti stream RTSP sungguhan.
+# Logika persistence memakai jam deterministik (waktu media rekaman), sehingga hasil event dapat diulang.
+# Model dapat diganti model tiruan (--stub-model) atau factory sendiri (--model-factory modul:fungsi).
+# Hasil berupa JSON berisi p50/p95/p99 per tahap (decode, preprocess, inference, tracking,
+# process_detections, io_sinks, frame_latency) dan throughput.
+#
+# Contoh:
+#   python benchmark.py --source rekaman.mp4 --mode max --stub-model --output hasil.json
+#   python benchmark.py --source ./frames --fps 15 --mode realtime --cameras 4
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ReplayClock:
+    """Jam deterministik: waktu sekarang = waktu media frame terbaru yang sudah diambil loop deteksi."""
+
+    def __init__(self, start: float = 0.0):
+        self.start = start
+        self._now = start
+        self._lock = threading.Lock()
+
+    def advance(self, media_time: float):
+        with self._lock:
+            self._now = max(self._now, self.start + media_time)
+
+    def __call__(self) -> float:
+        return self._now
+
+
+class ReplaySource:
+    """Pengganti FrameGrabber yang membaca frame dari file video atau folder gambar."""
+
+    def __init__(self, path: str, name: str, logger, mode: str = "max", fps: float = 0.0, clock: ReplayClock = None,
+                 timer: StageTimer = None, frame_event: threading.Event = None, on_finished=None):
+        self.source = path
+        self.name = name
+        self.logger = logger
+        self.mode = mode
+        self.fps = fps
+        self.clock = clock
+        self.timer = timer
+        self.frame_event = frame_event
+        self.on_finished = on_finished
+
+        self._buffer = deque(maxlen=1)
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._cap = None
+        self._images = None
+
+        # Statistik capture (sama dengan FrameGrabber)
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+
+    def start(self) -> bool:
+        """Membuka file video/folder gambar dan memulai thread replay."""
+        path = Path(self.source)
+        if path.is_dir():
+            self._images = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+            if not self._images:
+                return False
+            self.fps = self.fps or 25.0
+        else:
+            self._cap = cv2.VideoCapture(str(path))
+            if not self._cap.isOpened():
+                return False
+            self.fps = self.fps or self._cap.get(cv2.CAP_PROP_FPS) or 25.0
+
+        self._thread = threading.Thread(target=self._run, name=f"replay-{self.name}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def read(self, timeout: float = 1.0):
+        """Sama dengan FrameGrabber.read; sekaligus memajukan jam deterministik ke waktu media frame."""
+        with self._cond:
+            if not self._buffer:
+                self._cond.wait(timeout)
+            if not self._buffer:
+                return None, None
+            frame, captured_at, media_time = self._buffer.popleft()
+            self._cond.notify_all()
+        if self.clock is not None:
+            self.clock.advance(media_time)
+        return frame, captured_at
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_dropped": self.frames_dropped,
+                "reconnects": self.reconnects,
+                "buffered": len(self._buffer),
+            }
+
+    def _decode(self, index: int):
+        """Membaca frame ke-index; mengembalikan None di akhir rekaman."""
+        started = time.perf_counter()
+        if self._images is not None:
+            frame = cv2.imread(str(self._images[index])) if index < len(self._images) else None
+        else:
+            ret, frame = self._cap.read()
+            frame = frame if ret else None
+        if frame is not None and self.timer is not None:
+            self.timer.record("decode", time.perf_counter() - started)
+        return frame
+
+    def _run(self):
+        index = 0
+        started = time.monotonic()
+        while not self._stop_event.is_set():
+            frame = self._decode(index)
+            if frame is None:
+                break
+            media_time = index / self.fps
+            index += 1
+
+            with self._cond:
+                if self.mode == "realtime":
+                    if self._buffer:
+                        self.frames_dropped += 1
+                else:
+                    # Mode 'max': tunggu sampai frame sebelumnya diambil, tidak ada frame yang dibuang.
+                    while self._buffer and not self._stop_event.is_set():
+                        self._cond.wait(0.1)
+                self._buffer.append((frame, time.monotonic(), media_time))
+                self.frames_captured += 1
+                self._cond.notify_all()
+            if self.frame_event is not None:
+                self.frame_event.set()
+
+            if self.mode == "realtime":
+                # Tahan pembacaan sesuai FPS rekaman.
+                delay = started + index / self.fps - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+
+        # Tunggu frame terakhir diambil sebelum melaporkan replay selesai.
+        with self._cond:
+            while self._buffer and not self._stop_event.is_set() and self.mode == "max":
+                self._cond.wait(0.1)
+        if self._cap is not None:
+            self._cap.release()
+        if self.on_finished is not None:
+            self.on_finished(self)
+
+
+class StubModel:
+    """
+    Model tiruan deterministik dengan antarmuka predict() seperti YOLO.
+    Setiap frame berisi 'persons' box orang yang bergeser perlahan, sehingga tracker dan logika persistence
+    tetap bekerja seperti pada deteksi sungguhan. 'latency_ms' mensimulasikan waktu inferensi per batch.
+    """
+
+    def __init__(self, persons: int = 1, latency_ms: float = 0.0, confidence: float = 0.9):
+        from ultralytics.engine.results import Results
+        self._results_cls = Results
+        self.persons = persons
+        self.latency_ms = latency_ms
+        self.confidence = confidence
+        self.calls = 0
+
+    def predict(self, frames: list, verbose: bool = False, **kwargs) -> list:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        self.calls += 1
+        results = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            box_w, box_h = width * 0.15, height * 0.5
+            span = max(width - box_w, 1.0)
+            boxes = np.zeros((self.persons, 6), dtype=np.float32)
+            for p in range(self.persons):
+                x1 = (p * span / self.persons + self.calls * width * 0.002) % span
+                y1 = height * 0.25
+                boxes[p] = (x1, y1, x1 + box_w, y1 + box_h, self.confidence, 0)
+            results.append(self._results_cls(frame, path="replay", names={0: "person"}, boxes=boxes))
+        return results
+
+
+class DetectionCounter:
+    """
+    Membungkus model untuk menghitung box kelas target di atas confidence_threshold (sebelum tracking dan ROI).
+    Dipakai sebagai pembanding akurasi antar backend/imgsz/INT8 terhadap hasil backend 'torch' pada video yang sama.
+    """
+
+    def __init__(self, model, confidence_threshold: float, target_class: int):
+        self.model = model
+        self.confidence_threshold = confidence_threshold
+        self.target_class = target_class
+        self.frames = 0
+        self.frames_with_target = 0
+        self.boxes = 0
+        self.confidence_total = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    @property
+    def imgsz(self):
+        return self.model.imgsz
+
+    @imgsz.setter
+    def imgsz(self, value):
+        # Pengendali beban mengubah imgsz model yang dibungkus, bukan pembungkusnya.
+        self.model.imgsz = value
+
+    def predict(self, frames: list, **kwargs) -> list:
+        results = self.model.predict(frames, **kwargs)
+        for result in results:
+            det = result.boxes.cpu().numpy().data
+            confidences = det[(det[:, 4] >= self.confidence_threshold) & (det[:, 5] == self.target_class), 4]
+            self.frames += 1
+            self.frames_with_target += int(len(confidences) > 0)
+            self.boxes += len(confidences)
+            self.confidence_total += float(confidences.sum())
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "frames_with_target": self.frames_with_target,
+            "boxes": self.boxes,
+            "mean_confidence": self.confidence_total / self.boxes if self.boxes else 0.0,
+        }
+
+
+def load_model_factory(spec: str):
+    """Memuat factory model dari string 'modul:fungsi'. Fungsi dipanggil dengan dict konfigurasi."""
+    module_name, _, func_name = spec.partition(":")
+    if not func_name:
+        raise ValueError(f"Format --model-factory harus 'modul:fungsi', bukan '{spec}'.")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=Path(__file__).parent, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_config(args) -> dict:
+    """Menyalin config.yaml lalu mengarahkan kamera ke rekaman, mematikan tampilan/API, dan memindah output."""
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    output_dir = Path(args.output_dir)
+    config['cameras'] = [
+        {"name": f"replay-{i + 1}", "source_type": "file", "file_path": args.source}
+        for i in range(args.cameras)
+    ]
+    config.pop('camera', None)
+    for key in ("backend", "imgsz", "threads"):
+        if getattr(args, key):
+            config['model'][key] = getattr(args, key)
+    if args.int8:
+        config['model']['int8'] = True
+    config['display'] = {"headless": True, "preview": {"enabled": False}}
+    # Model dibungkus DetectionCounter; hot-reload (penggantian model) tidak dipakai saat replay.
+    config['config_reload'] = {"enabled": False}
+    config['storage']['captures']['path'] = str(output_dir / "captures")
+    config['storage']['framerecord']['path'] = str(output_dir / "framerecord")
+    if 'clips' in config['storage']:
+        config['storage']['clips']['path'] = str(output_dir / "clips")
+    config['storage']['log_path'] = str(output_dir / "benchmark.log")
+    config.setdefault('logging', {}).setdefault('jsonl', {})['path'] = str(output_dir / "benchmark.jsonl")
+    if 'outbox' in config['storage']:
+        config['storage']['outbox']['path'] = str(output_dir / "outbox.db")
+    if not args.with_api:
+        config['api']['whatsapp']['enabled'] = False
+        config['api']['log_server']['enabled'] = False
+    return config
+
+
+def run_benchmark(args) -> dict:
+    config = build_config(args)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config_path = output_dir / "benchmark_config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+    if args.model_factory:
+        model = load_model_factory(args.model_factory)(config)
+    elif args.stub_model:
+        model = StubModel(persons=args.stub_persons, latency_ms=args.stub_latency_ms)
+    else:
+        model = None  # model sungguhan dari config
+
+    detector = RealTimeDetector(str(config_path), model=model)
+    counter = None
+    if detector.inference_pool is None:
+        counter = DetectionCounter(detector.wait_for_model(), detector.confidence_threshold, detector.target_class)
+        detector.model = counter
+    # Dengan pool inferensi, model berada di worker process sehingga box sebelum tracking tidak dapat dihitung.
+    clock = ReplayClock()
+    timer = StageTimer()
+    detector.clock = clock
+    detector.stage_timer = timer
+
+    finished = []
+    finished_lock = threading.Lock()
+
+    def on_finished(source):
+        with finished_lock:
+            finished.append(source.name)
+            done = len(finished) == len(detector.cameras)
+        if done:
+            detector.stop_event.set()
+            detector.frame_event.set()
+
+    for cam in detector.cameras:
+        cam.grabber = ReplaySource(
+            args.source, cam.name, detector.logger, mode=args.mode, fps=args.fps, clock=clock, timer=timer,
+            frame_event=detector.frame_event, on_finished=on_finished,
+        )
+
+    started_at = datetime.now()
+    wall_started = time.perf_counter()
+    detector.run()
+    wall_time = time.perf_counter() - wall_started
+
+    stages = timer.summary()
+    frames = stages.get("frame_latency", {}).get("count", 0)
+    queue_stats = detector.event_queue.stats(reset_wait=False)
+    return {
+        "git_revision": git_revision(),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "source": args.source,
+        "mode": args.mode,
+        "cameras": args.cameras,
+        "model": args.model_factory or ("stub" if args.stub_model else config['model']['path']),
+        "backend": config['model'].get('backend', 'torch'),
+        "imgsz": config['model'].get('imgsz', 640),
+        "int8": bool(config['model'].get('int8', False)),
+        "frames_processed": frames,
+        "wall_time_sec": wall_time,
+        "throughput_fps": frames / wall_time if wall_time > 0 else 0.0,
+        "capture": {cam.name: cam.grabber.stats() for cam in detector.cameras},
+        "detections": counter.stats() if counter is not None else {"available": False,
+                                                                  "reason": "processing.inference_pool aktif"},
+        "events": {key: queue_stats[key] for key in ("enqueued", "dropped", "coalesced", "max_depth")},
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replay offline untuk pipeline deteksi.")
+    parser.add_argument("--source", required=True, help="File video atau folder berisi gambar frame.")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--mode", choices=("max", "realtime"), default="max",
+                        help="'max' = secepat mungkin tanpa membuang frame; 'realtime' = sesuai FPS rekaman.")
+    parser.add_argument("--fps", type=float, default=0.0,
+                        help="FPS rekaman (default: dari file video, atau 25 untuk folder gambar).")
+    parser.add_argument("--cameras", type=int, default=1, help="Jumlah kamera yang memutar rekaman yang sama.")
+    parser.add_argument("--stub-model", action="store_true", help="Gunakan model tiruan deterministik.")
+    parser.add_argument("--stub-persons", type=int, default=1)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--model-factory", help="Factory model 'modul:fungsi' yang menerima dict konfigurasi.")
+    parser.add_argument("--backend", choices=("torch", "onnxruntime", "openvino"), help="Menimpa model.backend.")
+    parser.add_argument("--imgsz", type=int, help="Menimpa model.imgsz.")
+    parser.add_argument("--threads", type=int, help="Menimpa model.threads.")
+    parser.add_argument("--int8", action="store_true", help="Menimpa model.int8 (butuh frame kalibrasi).")
+    parser.add_argument("--with-api", action="store_true", help="Tetap kirim API sesuai config (default: nonaktif).")
+    parser.add_argument("--output-dir", default="./data/benchmark", help="Folder untuk gambar dan log selama benchmark.")
+    parser.add_argument("--output", default="benchmark.json", help="File JSON hasil benchmark.")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    detections = report['detections']
+    if detections.get('available', True):
+        print(f"Deteksi: {detections['boxes']} box target di {detections['frames_with_target']}/{detections['frames']} frame "
+              f"(confidence rata-rata {detections['mean_confidence']:.2f}).")
+    else:
+        print(f"Deteksi: tidak tersedia ({detections['reason']}).")
+    print(f"{report['frames_processed']} frame dalam {report['wall_time_sec']:.2f} s "
+          f"({report['throughput_fps']:.1f} FPS), {report['events']['enqueued']} event.")
+    for stage, values in report['stages'].items():
+        print(f"  {stage:<20} p50 {values['p50_ms']:8.2f} ms   p95 {values['p95_ms']:8.2f} ms   p99 {values['p99_ms']:8.2f} ms")
+    print(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import logging
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from capture import FrameGrabber
+from clip_recorder import ClipRecorder
+from motion import MotionGate
+from propagation import TrackPropagator
+from track_store import TrackStore
+from tracking import CameraTracker
+
+# Konteks Kamera (CameraContext)
+
+# Menyimpan seluruh state milik satu kamera agar banyak kamera bisa berjalan dalam satu proses:
+# sumber video dan FrameGrabber, ROI, tracker ByteTrack, tracked_persons, serta statistik FPS.
+# Model YOLO tidak disimpan di sini; model dibagi oleh semua kamera melalui RealTimeDetector.
+# Mode ROI 'crop' memotong frame ke kotak pembatas poligon ROI sebelum inferensi, lalu memetakan
+# box hasil deteksi kembali ke koordinat frame penuh. Mode 'mask' menghitamkan area di luar ROI pada frame penuh.
+# Dengan inferensi jarang (propagation.py), kamera juga menentukan frame mana yang dideteksi dan mana yang dipropagasi.
+
+ROI_MODES = ("crop", "mask")
+
+
+def resolve_video_source(camera_cfg: dict, logger: logging.Logger):
+    """Menentukan sumber video (URL RTSP, ID webcam, atau path file video) dari konfigurasi kamera."""
+    source_type = camera_cfg['source_type'].lower()
+
+    if source_type == 'rtsp':
+        video_source = camera_cfg['rtsp_url']
+        logger.info(f"📹 Menggunakan sumber video RTSP: {video_source}")
+    elif source_type == 'webcam':
+        video_source = camera_cfg['webcam_id']
+        logger.info(f"📷 Menggunakan sumber video Webcam dengan ID: {video_source}")
+    elif source_type == 'file':
+        video_source = camera_cfg['file_path']
+        logger.info(f"🎞️ Menggunakan sumber video file: {video_source}")
+    else:
+        logger.error(f"Tipe sumber '{source_type}' tidak valid. Menggunakan webcam default (ID: 0) sebagai fallback.")
+        video_source = 0
+    return video_source
+
+
+class CameraContext:
+    """State per kamera: sumber video, ROI, tracker, dan status orang yang terlacak."""
+
+    def __init__(self, name: str, camera_cfg: dict, processing_cfg: dict, capture_cfg: dict, logger: logging.Logger,
+                 track_timeout_sec: float = 5.0, motion_cfg: dict = None, frame_event=None, clip_cfg: dict = None,
+                 sparse_cfg: dict = None):
+        self.name = name
+        self.logger = logger
+        self.source = resolve_video_source(camera_cfg, logger)
+
+        self.configure_roi(camera_cfg, processing_cfg)
+
+        # State Management
+        self.tracked_persons = TrackStore(track_timeout_sec)
+        self._tracker = None
+
+        self.grabber = FrameGrabber(
+            self.source, logger,
+            drop_policy=capture_cfg.get('drop_policy', 'latest'),
+            buffer_size=capture_cfg.get('buffer_size', 3),
+            reconnect_delay_sec=capture_cfg.get('reconnect_delay_sec', 5),
+            name=name,
+            frame_event=frame_event,
+        )
+
+        # Motion gate (opsional): lewati inferensi jika scene di dalam ROI tidak berubah.
+        motion_cfg = motion_cfg or {}
+        self.motion_gate = None
+        if motion_cfg.get('enabled', False):
+            self.motion_gate = MotionGate(
+                method=motion_cfg.get('method', 'diff'),
+                downscale_width=motion_cfg.get('downscale_width', 160),
+                pixel_threshold=motion_cfg.get('pixel_threshold', 25),
+                min_area_ratio=motion_cfg.get('min_area_ratio', 0.002),
+                keepalive_sec=motion_cfg.get('keepalive_sec', 1.0),
+            )
+            if self.motion_gate.keepalive_sec >= track_timeout_sec:
+                logger.warning(
+                    f"[{name}] keepalive_sec motion gate ({self.motion_gate.keepalive_sec}s) tidak lebih kecil dari "
+                    f"disappearance_timeout_sec ({track_timeout_sec}s); orang yang diam dapat dianggap hilang."
+                )
+
+        # Inferensi jarang (opsional): detektor hanya dijalankan setiap beberapa frame, box dipropagasi di antaranya.
+        sparse_cfg = sparse_cfg or {}
+        self.propagator = None
+        if sparse_cfg.get('enabled', False):
+            self.propagator = TrackPropagator(
+                mode=sparse_cfg.get('mode', 'fixed'),
+                interval=sparse_cfg.get('interval', 3),
+                min_interval=sparse_cfg.get('min_interval', 1),
+                max_interval=sparse_cfg.get('max_interval', 6),
+                crowd_tracks=sparse_cfg.get('crowd_tracks', 5),
+                max_drift=sparse_cfg.get('max_drift', 0.3),
+                flow_width=sparse_cfg.get('flow_width', 320),
+                points_per_track=sparse_cfg.get('points_per_track', 8),
+            )
+
+        # Perekam klip sebelum/sesudah event (opsional).
+        clip_cfg = clip_cfg or {}
+        self.clip_recorder = None
+        if clip_cfg.get('enabled', False):
+            self.clip_recorder = ClipRecorder(
+                name, logger,
+                path=clip_cfg.get('path', './data/clips'),
+                pre_seconds=clip_cfg.get('pre_seconds', 5),
+                post_seconds=clip_cfg.get('post_seconds', 5),
+                fps=clip_cfg.get('fps', 5),
+                max_width=clip_cfg.get('max_width', 640),
+                jpeg_quality=clip_cfg.get('jpeg_quality', 70),
+                max_clip_seconds=clip_cfg.get('max_clip_seconds', 60),
+                codec=clip_cfg.get('codec', 'mp4v'),
+            )
+
+        # Statistik per kamera
+        self.frames_processed = 0
+        self.frames_gated = 0
+        self.total_frames_gated = 0
+        self.frames_propagated = 0
+        self.frame_ages = []
+        self._stats_started_at = time.monotonic()
+        self._processed_times = deque(maxlen=30)  # waktu selesai frame terakhir, untuk FPS efektif (metrik)
+
+    def configure_roi(self, camera_cfg: dict, processing_cfg: dict):
+        """Mengatur ROI dari config. ROI mask dibuat ulang dari frame berikutnya."""
+        self.apply_roi(self.resolve_roi(camera_cfg, processing_cfg))
+
+    def resolve_roi(self, camera_cfg: dict, processing_cfg: dict) -> dict:
+        """
+        Membaca pengaturan ROI dari config tanpa mengubah state kamera (dipakai hot-reload untuk membangun
+        state baru sebelum diterapkan).
+        """
+        # ROI bisa diatur per kamera; jika tidak ada, gunakan pengaturan global 'processing'.
+        enable_roi = camera_cfg.get('enable_roi', processing_cfg['enable_roi'])
+        roi_points = camera_cfg.get('roi_points', processing_cfg['roi_points'])
+        roi_mode = camera_cfg.get('roi_mode', processing_cfg.get('roi_mode', 'crop'))
+        if roi_mode not in ROI_MODES:
+            self.logger.error(f"[{self.name}] Mode ROI '{roi_mode}' tidak valid. Menggunakan 'crop' sebagai fallback.")
+            roi_mode = 'crop'
+        return {
+            "roi_points": np.array(roi_points, dtype=np.int32) if enable_roi else None,
+            "roi_mode": roi_mode,
+            "roi_crop_mask": camera_cfg.get('roi_crop_mask', processing_cfg.get('roi_crop_mask', True)),
+        }
+
+    def apply_roi(self, roi: dict):
+        """Menerapkan hasil resolve_roi; mask dan kotak pembatas ROI dihitung ulang dari frame berikutnya."""
+        self.roi_points = roi["roi_points"]
+        self.roi_mode = roi["roi_mode"]
+        self.roi_crop_mask = roi["roi_crop_mask"]
+        self.roi_mask = None
+        self.roi_rect = None       # (x, y, w, h) kotak pembatas ROI pada frame penuh
+        self.roi_crop_mask_img = None  # potongan ROI mask seukuran roi_rect
+
+    @property
+    def tracker(self) -> CameraTracker:
+        """Tracker ByteTrack kamera ini, dibuat saat pertama dipakai (tidak dibutuhkan jika tracking di worker)."""
+        if self._tracker is None:
+            self._tracker = CameraTracker()
+        return self._tracker
+
+    def build_roi_mask(self, frame: np.ndarray):
+        """
+        Membuat ROI mask dan kotak pembatasnya sesuai ukuran frame.
+        Dibuat ulang jika resolusi stream berubah (misalnya setelah reconnect).
+        """
+        if self.roi_points is None:
+            return
+        if self.roi_mask is not None and self.roi_mask.shape == frame.shape[:2]:
+            return
+        if self.roi_mask is not None:
+            self.logger.info(f"🔄 [{self.name}] Resolusi stream berubah menjadi {frame.shape[1]}x{frame.shape[0]}. ROI mask dibuat ulang.")
+
+        self.roi_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        cv2.fillPoly(self.roi_mask, [self.roi_points], 255)
+
+        x, y, w, h = cv2.boundingRect(self.roi_points)
+        height, width = frame.shape[:2]
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + w, width), min(y + h, height)
+        if x2 <= x1 or y2 <= y1:
+            self.logger.warning(f"[{self.name}] ROI berada di luar frame {width}x{height}. Inferensi dilakukan pada frame penuh.")
+            self.roi_rect = (0, 0, width, height)
+        else:
+            self.roi_rect = (x1, y1, x2 - x1, y2 - y1)
+        x, y, w, h = self.roi_rect
+        self.roi_crop_mask_img = self.roi_mask[y:y + h, x:x + w]
+
+    def needs_inference(self, frame: np.ndarray, now: float) -> bool:
+        """Mengecek motion gate; frame tanpa perubahan di ROI tidak perlu diinferensi."""
+        self.build_roi_mask(frame)
+        if self.motion_gate is None:
+            return True
+        if self.motion_gate.should_infer(frame, self.roi_mask, now):
+            return True
+        self.frames_gated += 1
+        self.total_frames_gated += 1
+        return False
+
+    def needs_detection(self) -> bool:
+        """Mengecek jadwal inferensi jarang; False berarti box track cukup dipropagasi pada frame ini."""
+        return self.propagator is None or self.propagator.should_detect()
+
+    def propagate_tracks(self, frame: np.ndarray) -> np.ndarray:
+        """Menggeser box track hasil deteksi terakhir ke frame ini tanpa menjalankan detektor."""
+        self.frames_propagated += 1
+        return self.propagator.propagate(frame)
+
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Menyiapkan frame untuk inferensi sesuai mode ROI (crop, mask, atau frame penuh)."""
+        self.build_roi_mask(frame)
+        if self.roi_mask is None:
+            return frame
+        if self.roi_mode == 'mask':
+            return cv2.bitwise_and(frame, frame, mask=self.roi_mask)
+
+        x, y, w, h = self.roi_rect
+        crop = frame[y:y + h, x:x + w]
+        if self.roi_crop_mask:
+            # Masking hanya di dalam potongan, bukan di seluruh frame.
+            return cv2.bitwise_and(crop, crop, mask=self.roi_crop_mask_img)
+        return crop
+
+    def to_frame_coords(self, tracks: np.ndarray) -> np.ndarray:
+        """Memetakan box hasil inferensi pada potongan ROI kembali ke koordinat frame penuh."""
+        if self.roi_mask is None or self.roi_mode != 'crop' or len(tracks) == 0:
+            return tracks
+        x, y, _, _ = self.roi_rect
+        tracks = tracks.copy()
+        tracks[:, [0, 2]] += x
+        tracks[:, [1, 3]] += y
+        return tracks
+
+    def roi_contains(self, points: np.ndarray) -> np.ndarray:
+        """Mengecek (secara vektor) apakah titik-titik (N x 2, format x, y) berada di dalam ROI mask."""
+        inside = np.zeros(len(points), dtype=bool)
+        if self.roi_mask is None:
+            return inside
+        height, width = self.roi_mask.shape
+        xs, ys = points[:, 0], points[:, 1]
+        valid = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        inside[valid] = self.roi_mask[ys[valid], xs[valid]] > 0
+        return inside
+
+    def mark_processed(self):
+        """Menandai satu frame selesai diproses."""
+        self.frames_processed += 1
+        self._processed_times.append(time.monotonic())
+
+    def effective_fps(self) -> float:
+        """FPS efektif dari 30 frame terakhir; 0 jika kamera tidak memproses frame selama lebih dari 5 detik."""
+        times = self._processed_times
+        if len(times) < 2 or time.monotonic() - times[-1] > 5.0:
+            return 0.0
+        return (len(times) - 1) / max(times[-1] - times[0], 1e-6)
+
+    def log_stats(self):
+        """Mencatat FPS efektif kamera dan statistik capture, lalu mereset jendela statistik."""
+        now = time.monotonic()
+        elapsed = max(now - self._stats_started_at, 1e-6)
+        fps = self.frames_processed / elapsed
+        stats = self.grabber.stats()
+        if self.frame_ages:
+            avg_age_ms = sum(self.frame_ages) / len(self.frame_ages) * 1000
+            max_age_ms = max(self.frame_ages) * 1000
+        else:
+            avg_age_ms = max_age_ms = 0.0
+        self.logger.info(
+            f"📊 [{self.name}] {fps:.1f} FPS. Capture: {stats['frames_captured']} frame diterima, "
+            f"{stats['frames_dropped']} dibuang, {stats['reconnects']} reconnect. "
+            f"Umur frame saat inferensi: rata-rata {avg_age_ms:.0f} ms, maks {max_age_ms:.0f} ms."
+        )
+        self.logger.info(
+            f"🧹 [{self.name}] Track store: {len(self.tracked_persons)} track aktif, "
+            f"{self.tracked_persons.evictions} track kedaluwarsa dihapus sejak awal."
+        )
+        if self.motion_gate is not None:
+            self.logger.info(
+                f"💤 [{self.name}] Motion gate: {self.frames_gated}/{self.frames_processed} frame dilewati "
+                f"(total {self.total_frames_gated})."
+            )
+        if self.propagator is not None:
+            self.logger.info(
+                f"🔭 [{self.name}] Inferensi jarang: {self.frames_propagated}/{self.frames_processed} frame dipropagasi "
+                f"tanpa detektor (interval saat ini {self.propagator.current_interval()}, "
+                f"total {self.propagator.frames_propagated}, {self.propagator.tracks_lost} track kehilangan titik flow)."
+            )
+        if self.clip_recorder is not None:
+            self.logger.info(
+                f"🎬 [{self.name}] Perekam klip: {self.clip_recorder.clips_written} klip ditulis, "
+                f"{self.clip_recorder.frames_dropped} frame dibuang karena perekam tertinggal, "
+                f"{self.clip_recorder.triggers_lost} klip gagal dibuat."
+            )
+        self.frames_processed = 0
+        self.frames_gated = 0
+        self.frames_propagated = 0
+        self.frame_ages.clear()
+        self._stats_started_at = now
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Tahap Capture (FrameGrabber)
+
+# Membaca frame dari sumber video (RTSP/webcam) di thread tersendiri, terpisah dari loop deteksi.
+# Hanya menyimpan frame terbaru ('latest') atau antrian terbatas ('ring'), sehingga buffer RTSP tidak menumpuk.
+# Menghitung frame yang dibuang dan mencatat waktu capture setiap frame untuk mengukur umur frame saat inferensi.
+# Logika reconnect (tunggu 5 detik lalu buka ulang) dijalankan di sini agar stream yang macet tidak menghambat deteksi.
+
+DROP_POLICIES = ("latest", "ring")
+
+
+class FrameGrabber:
+    """Thread capture yang terus membaca sumber video dan menyimpan frame terbaru."""
+
+    def __init__(self, source, logger: logging.Logger, drop_policy: str = "latest", buffer_size: int = 3,
+                 reconnect_delay_sec: float = 5.0, name: str = "camera", frame_event: threading.Event = None):
+        if drop_policy not in DROP_POLICIES:
+            logger.error(f"Drop policy '{drop_policy}' tidak valid. Menggunakan 'latest' sebagai fallback.")
+            drop_policy = "latest"
+
+        self.source = source
+        self.logger = logger
+        self.name = name
+        self.drop_policy = drop_policy
+        self.reconnect_delay_sec = reconnect_delay_sec
+        # Event bersama (opsional) untuk membangunkan loop deteksi multi-kamera saat ada frame baru.
+        self.frame_event = frame_event
+
+        maxlen = 1 if drop_policy == "latest" else max(1, int(buffer_size))
+        self._buffer = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._cap = None
+
+        # Statistik capture
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+
+    def start(self) -> bool:
+        """
+        Membuka sumber video dan memulai thread capture. Mengembalikan False jika sumber gagal dibuka;
+        thread tetap berjalan dan mencoba menyambung ulang setiap reconnect_delay_sec.
+        """
+        self._cap = cv2.VideoCapture(self.source)
+        opened = self._cap.isOpened()
+        if opened:
+            # Minta backend menyimpan sesedikit mungkin frame di buffer internalnya.
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+        return opened
+
+    def stop(self):
+        """Menghentikan thread capture dan melepaskan sumber video."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reconnect_delay_sec + 1)
+
+    def read(self, timeout: float = 1.0):
+        """
+        Mengambil frame berikutnya untuk diproses.
+        Mengembalikan tuple (frame, captured_at) atau (None, None) jika tidak ada frame baru dalam batas waktu.
+        """
+        with self._cond:
+            if not self._buffer:
+                self._cond.wait(timeout)
+            if not self._buffer:
+                return None, None
+            # 'latest' hanya berisi satu frame; 'ring' diproses berurutan (FIFO).
+            return self._buffer.popleft()
+
+    def stats(self) -> dict:
+        """Mengembalikan ringkasan statistik capture."""
+        with self._cond:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_dropped": self.frames_dropped,
+                "reconnects": self.reconnects,
+                "buffered": len(self._buffer),
+            }
+
+    def _run(self):
+        """Loop capture: membaca frame, menangani reconnect, dan menerapkan drop policy."""
+        cap = self._cap
+        while not self._stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                # Selama kamera mati, peringatan ini dibatasi lajunya per kamera (RateLimitFilter di logger).
+                self.logger.warning(
+                    f"Frame kosong dari sumber {self.source}. Mencoba menyambung ulang dalam {self.reconnect_delay_sec:g} detik...",
+                    extra={"event": "reconnect", "camera": self.name, "rate_limit_key": f"frame-kosong-{self.name}"},
+                )
+                cap.release()
+                if self._stop_event.wait(self.reconnect_delay_sec):
+                    break
+                cap = cv2.VideoCapture(self.source)
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                self.reconnects += 1
+                continue
+
+            captured_at = time.monotonic()
+            with self._cond:
+                if len(self._buffer) == self._buffer.maxlen:
+                    # Frame tertua belum sempat diproses dan akan tertimpa.
+                    self.frames_dropped += 1
+                self._buffer.append((frame, captured_at))
+                self.frames_captured += 1
+                self._cond.notify()
+            if self.frame_event is not None:
+                self.frame_event.set()
+
+        cap.release()
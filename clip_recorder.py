@@ -0,0 +1,196 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Perekam Klip Sebelum/Sesudah Event (ClipRecorder)
+
+# Menyimpan beberapa detik terakhir setiap kamera dalam ring buffer berisi frame JPEG (bukan frame mentah),
+# dengan FPS dan resolusi yang dibatasi, sehingga memori per kamera tetap kecil (ratusan KB, bukan GB).
+# Saat deteksi valid terjadi, isi ring ditulis ke file MP4 lalu frame N detik berikutnya ditambahkan.
+# Event lain di kamera yang sama selama klip masih direkam digabung ke klip tersebut (waktu selesai diperpanjang,
+# dibatasi max_clip_seconds).
+# Loop deteksi hanya memperkecil frame dan memasukkannya ke antrian terbatas (frame dibuang jika perekam
+# tertinggal); trigger dan sinyal berhenti lewat kanal kontrol terpisah yang tidak memblokir dan tidak pernah dibuang.
+# Encoding JPEG dan penulisan MP4 dilakukan di thread perekam per kamera.
+
+
+class ClipRecorder:
+    """Ring buffer JPEG dan penulis klip MP4 untuk satu kamera."""
+
+    def __init__(self, camera_name: str, logger: logging.Logger, path: str = "./data/clips", pre_seconds: float = 5.0,
+                 post_seconds: float = 5.0, fps: float = 5.0, max_width: int = 640, jpeg_quality: int = 70,
+                 max_clip_seconds: float = 60.0, codec: str = "mp4v"):
+        self.camera_name = camera_name
+        self.logger = logger
+        self.path = Path(path)
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = max(0.1, float(fps))
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.max_clip_seconds = max_clip_seconds
+        self.codec = codec
+
+        self._interval = 1.0 / self.fps
+        self._last_added = None
+        self._queue = queue.Queue(maxsize=max(4, int(self.fps * 2)))   # (timestamp, frame) atau None (bangunkan)
+        self._control = deque()   # ("trigger", timestamp, track_id) / ("stop", None, None); tidak pernah dibuang
+        self._ring = deque()   # (timestamp, jpeg bytes)
+
+        # State klip yang sedang direkam (hanya diakses thread perekam)
+        self._writer = None
+        self._writer_size = None
+        self._clip_path = None
+        self._clip_started = None
+        self._clip_end = None
+        self._clip_track_ids = []
+        self._last_frame_at = None
+
+        # Statistik
+        self.frames_dropped = 0
+        self.clips_written = 0
+        self.triggers_lost = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"clip-{camera_name}", daemon=True)
+        self._thread.start()
+
+    # --- Dipanggil dari loop deteksi ---
+
+    def add_frame(self, frame: np.ndarray, timestamp: float):
+        """Menambahkan frame (dibatasi sesuai fps dan max_width) ke antrian perekam tanpa memblokir."""
+        if self._last_added is not None and timestamp - self._last_added < self._interval:
+            return
+        self._last_added = timestamp
+        height, width = frame.shape[:2]
+        if self.max_width and width > self.max_width:
+            scale = self.max_width / width
+            small = cv2.resize(frame, (self.max_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        else:
+            small = frame.copy()
+        try:
+            self._queue.put_nowait((timestamp, small))
+        except queue.Full:
+            # Perekam tertinggal: frame dibuang, loop deteksi tidak pernah menunggu.
+            self.frames_dropped += 1
+
+    def trigger(self, timestamp: float, track_id: int):
+        """Memulai klip (atau memperpanjang klip yang sedang direkam) untuk deteksi valid pada 'timestamp'."""
+        # Trigger lewat kanal kontrol tanpa batas: tidak memblokir loop deteksi dan tidak pernah dibuang.
+        self._control.append(("trigger", timestamp, track_id))
+
+    def close(self, timeout: float = 5.0):
+        """Menyelesaikan klip yang sedang direkam lalu menghentikan thread perekam."""
+        self._control.append(("stop", None, None))
+        self._wake()
+        self._thread.join(timeout)
+
+    # --- Thread perekam ---
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass   # Antrian penuh berarti thread perekam sedang bekerja dan akan segera memeriksa kanal kontrol.
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+                # Stream macet: selesaikan klip jika tidak ada frame baru selama post_seconds.
+                if self._writer is not None and time.monotonic() - self._last_frame_at > self.post_seconds:
+                    self._finish_clip()
+            try:
+                if item is not None:
+                    self._on_frame(*item)
+                # Trigger diproses setelah frame sampai waktunya masuk ring (atau saat tidak ada frame lagi).
+                if self._drain_control(item[0] if item is not None else float("inf")):
+                    break
+            except Exception as e:
+                self.logger.error(f"[{self.camera_name}] Error pada perekam klip: {e}", exc_info=True)
+        if self._writer is not None:
+            self._finish_clip()
+
+    def _drain_control(self, up_to: float) -> bool:
+        """Memproses pesan kontrol yang sudah jatuh tempo; mengembalikan True jika perekam harus berhenti."""
+        while self._control:
+            kind, timestamp, track_id = self._control[0]
+            if kind == "trigger" and timestamp > up_to:
+                break
+            if kind == "stop" and not self._queue.empty():
+                # Frame yang sudah diantrikan tetap ditulis sebelum berhenti.
+                break
+            self._control.popleft()
+            if kind == "stop":
+                return True
+            self._on_trigger(timestamp, track_id)
+        return False
+
+    def _on_frame(self, timestamp: float, frame: np.ndarray):
+        self._last_frame_at = time.monotonic()
+        if self._writer is not None:
+            if timestamp > self._clip_end:
+                self._finish_clip()
+            else:
+                self._write(frame)
+
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ok:
+            self._ring.append((timestamp, buffer.tobytes()))
+        while self._ring and timestamp - self._ring[0][0] > self.pre_seconds:
+            self._ring.popleft()
+
+    def _on_trigger(self, timestamp: float, track_id: int):
+        if self._writer is not None:
+            # Event yang tumpang tindih digabung ke klip yang sedang direkam.
+            self._clip_end = min(timestamp + self.post_seconds, self._clip_started + self.max_clip_seconds)
+            self._clip_track_ids.append(track_id)
+            return
+        if not self._ring:
+            self.triggers_lost += 1
+            self.logger.warning(
+                f"⚠️ [{self.camera_name}] Klip untuk ID {track_id} tidak dapat dibuat: belum ada frame di ring buffer.",
+                extra={"event": "clip_lost", "camera": self.camera_name, "track_id": track_id},
+            )
+            return
+
+        now = datetime.now()
+        folder = self.path / now.strftime('%Y-%m-%d')
+        folder.mkdir(parents=True, exist_ok=True)
+        self._clip_path = folder / f"clip_{self.camera_name}_id_{track_id}_{now.strftime('%H%M%S')}.mp4"
+        self._clip_started = self._ring[0][0]
+        self._clip_end = min(timestamp + self.post_seconds, self._clip_started + self.max_clip_seconds)
+        self._clip_track_ids = [track_id]
+
+        # Tulis isi ring (detik-detik sebelum event) sebagai awal klip.
+        for _, jpeg in self._ring:
+            self._write(cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR))
+
+    def _write(self, frame: np.ndarray):
+        if self._writer is None:
+            height, width = frame.shape[:2]
+            self._writer_size = (width, height)
+            # Ditulis ke file sementara lalu di-rename saat selesai, agar pembaca tidak melihat klip setengah jadi.
+            tmp_path = self._clip_path.with_name(f".{self._clip_path.stem}.part.mp4")
+            self._writer = cv2.VideoWriter(str(tmp_path), cv2.VideoWriter_fourcc(*self.codec), self.fps, self._writer_size)
+        if (frame.shape[1], frame.shape[0]) != self._writer_size:
+            frame = cv2.resize(frame, self._writer_size, interpolation=cv2.INTER_AREA)
+        self._writer.write(frame)
+
+    def _finish_clip(self):
+        self._writer.release()
+        self._writer = None
+        tmp_path = self._clip_path.with_name(f".{self._clip_path.stem}.part.mp4")
+        os.replace(tmp_path, self._clip_path)
+        self.clips_written += 1
+        ids = ", ".join(str(track_id) for track_id in self._clip_track_ids)
+        self.logger.info(f"🎬 [{self.camera_name}] Klip disimpan: {self._clip_path} (ID: {ids})")
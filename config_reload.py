@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+
+import yaml
+
+from camera import ROI_MODES
+
+# Hot-Reload Konfigurasi (ConfigWatcher)
+
+# Mengubah ROI, threshold, atau endpoint API tidak lagi memerlukan restart (memuat ulang YOLO dan reconnect RTSP).
+# ConfigWatcher memeriksa mtime/ukuran config.yaml secara berkala (atau saat sinyal SIGHUP diterima),
+# lalu memuat dan memvalidasi file tersebut. Config yang tidak valid (YAML rusak, file setengah tersimpan,
+# nilai di luar rentang) ditolak dan config lama tetap dipakai.
+# Pemeriksaan dipanggil dari loop deteksi dan config yang valid diterapkan RealTimeDetector di antara dua batch
+# frame, sehingga satu frame tidak pernah diproses dengan campuran config lama dan baru.
+# Perubahan model (path, backend, imgsz, ...) atau device memicu pemuatan model di thread latar belakang;
+# model lama tetap dipakai sampai model baru siap. Bagian yang hanya dibaca saat startup dilaporkan sebagai
+# perlu restart.
+
+# Kunci 'model' yang memengaruhi pemuatan model (perubahan memicu penggantian model di latar belakang).
+MODEL_LOAD_KEYS = ("path", "backend", "imgsz", "threads", "warmup_runs", "int8", "int8_calibration", "cache_dir")
+
+# Pengaturan ROI (global di 'processing' atau per kamera) yang dapat diubah tanpa restart.
+ROI_KEYS = ("enable_roi", "roi_points", "roi_mode", "roi_crop_mask")
+
+# Bagian config yang hanya dibaca saat startup; perubahan di sini memerlukan restart.
+RESTART_SECTIONS = ("capture", "notifications", "display", "metrics", "logging", "config_reload")
+
+
+def validate_config(config) -> list:
+    """
+    Memeriksa struktur dan rentang nilai config; mengembalikan daftar pesan error (kosong jika valid).
+    Semua kunci yang dibaca saat config diterapkan dan di jalur deteksi (tanpa nilai default) wajib ada.
+    """
+    if not isinstance(config, dict):
+        return ["config harus berupa mapping YAML"]
+    errors = []
+    for section in ("model", "processing", "tracking", "storage", "api"):
+        if not isinstance(config.get(section), dict):
+            errors.append(f"bagian '{section}' tidak ada")
+    if errors:
+        return errors
+
+    model_cfg = config['model']
+    if not isinstance(model_cfg.get('path'), str) or not model_cfg['path']:
+        errors.append("model.path harus berupa string")
+    confidence = model_cfg.get('confidence_threshold')
+    if not _is_number(confidence) or not 0 <= confidence <= 1:
+        errors.append("model.confidence_threshold harus bernilai 0..1")
+    if not isinstance(model_cfg.get('target_class'), int) or isinstance(model_cfg.get('target_class'), bool):
+        errors.append("model.target_class harus berupa bilangan bulat")
+
+    tracking_cfg = config['tracking']
+    for key in ("persistence_threshold_sec", "disappearance_timeout_sec"):
+        value = tracking_cfg.get(key)
+        if not _is_number(value) or value < 0:
+            errors.append(f"tracking.{key} harus berupa angka >= 0")
+
+    processing_cfg = config['processing']
+    if not isinstance(processing_cfg.get('device'), str) or not processing_cfg['device']:
+        errors.append("processing.device harus berupa string")
+    if not isinstance(processing_cfg.get('enable_roi'), bool):
+        errors.append("processing.enable_roi harus bernilai true/false")
+    if 'roi_points' not in processing_cfg:
+        errors.append("processing.roi_points tidak ada")
+
+    camera_cfgs = config.get('cameras')
+    if camera_cfgs is None:
+        if not isinstance(config.get('camera'), dict):
+            errors.append("cameras (atau camera) tidak ada")
+            return errors
+        camera_cfgs = [config['camera']]
+    if not isinstance(camera_cfgs, list) or not camera_cfgs:
+        errors.append("cameras harus berupa daftar kamera")
+        return errors
+    for index, camera_cfg in enumerate([processing_cfg] + camera_cfgs):
+        where = "processing" if index == 0 else f"kamera #{index}"
+        if not isinstance(camera_cfg, dict):
+            errors.append(f"{where} harus berupa mapping")
+            continue
+        if 'roi_points' in camera_cfg and not _valid_polygon(camera_cfg['roi_points']):
+            errors.append(f"{where}: roi_points harus berupa minimal 3 titik [x, y]")
+        if index and 'enable_roi' in camera_cfg and not isinstance(camera_cfg['enable_roi'], bool):
+            errors.append(f"{where}: enable_roi harus bernilai true/false")
+        if 'roi_mode' in camera_cfg and camera_cfg['roi_mode'] not in ROI_MODES:
+            errors.append(f"{where}: roi_mode harus salah satu dari {', '.join(ROI_MODES)}")
+
+    storage_cfg = config['storage']
+    for sink, flag in (("captures", "save_crop"), ("framerecord", "enabled")):
+        sink_cfg = storage_cfg.get(sink)
+        if not isinstance(sink_cfg, dict) or not isinstance(sink_cfg.get('path'), str):
+            errors.append(f"storage.{sink}.path tidak ada")
+        elif not isinstance(sink_cfg.get(flag), bool):
+            errors.append(f"storage.{sink}.{flag} harus bernilai true/false")
+    if 'jpeg' in storage_cfg and not isinstance(storage_cfg['jpeg'], dict):
+        errors.append("storage.jpeg harus berupa mapping")
+
+    api_cfg = config['api']
+    if not isinstance(api_cfg.get('api_key'), str):
+        errors.append("api.api_key harus berupa string")
+    for service in ("whatsapp", "log_server"):
+        service_cfg = api_cfg.get(service)
+        if not isinstance(service_cfg, dict):
+            errors.append(f"api.{service} tidak ada")
+        elif not isinstance(service_cfg.get('enabled'), bool):
+            errors.append(f"api.{service}.enabled harus bernilai true/false")
+        elif service_cfg['enabled'] and not service_cfg.get('endpoint'):
+            errors.append(f"api.{service}.endpoint wajib diisi jika layanan aktif")
+    if 'http' in api_cfg and not isinstance(api_cfg['http'], dict):
+        errors.append("api.http harus berupa mapping")
+    return errors
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _valid_polygon(points) -> bool:
+    if not isinstance(points, list) or len(points) < 3:
+        return False
+    return all(
+        isinstance(point, (list, tuple)) and len(point) == 2 and all(isinstance(v, (int, float)) for v in point)
+        for point in points
+    )
+
+
+class ConfigWatcher:
+    """Mendeteksi perubahan config.yaml dan menyiapkan config baru yang sudah divalidasi."""
+
+    def __init__(self, path: str, logger: logging.Logger, interval_sec: float = 2.0):
+        self.path = path
+        self.logger = logger
+        self.interval_sec = interval_sec
+        self._signature = self._stat()
+        self._next_check = 0.0
+        self._requested = threading.Event()
+
+        # Statistik
+        self.reloads = 0
+        self.rejected = 0
+
+    def request_reload(self):
+        """Meminta pemuatan ulang pada pemeriksaan berikutnya (dipanggil dari handler sinyal SIGHUP)."""
+        self._requested.set()
+
+    def poll(self, now: float):
+        """
+        Dipanggil dari loop deteksi. Mengembalikan config baru yang valid jika file berubah (atau reload diminta),
+        selain itu None. Pemeriksaan file dibatasi sekali per interval_sec.
+        """
+        requested = self._requested.is_set()
+        if not requested and (self.interval_sec <= 0 or now < self._next_check):
+            return None
+        self._next_check = now + self.interval_sec
+        self._requested.clear()
+
+        signature = self._stat()
+        if not requested and signature == self._signature:
+            return None
+        self._signature = signature
+
+        try:
+            with open(self.path, 'r') as f:
+                config = yaml.safe_load(f)
+        except (OSError, yaml.YAMLError) as e:
+            self.rejected += 1
+            self.logger.error(f"❌ Config baru tidak dapat dibaca, config lama tetap dipakai: {e}")
+            return None
+        errors = validate_config(config)
+        if errors:
+            self.rejected += 1
+            self.logger.error(f"❌ Config baru tidak valid, config lama tetap dipakai: {'; '.join(errors)}")
+            return None
+        self.reloads += 1
+        return config
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
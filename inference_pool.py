@@ -0,0 +1,296 @@
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Pool Inferensi Multi-Proses (InferencePool)
+
+# Satu proses Python tidak dapat memakai semua core CPU: GIL menyerialkan inferensi, tracking, menggambar, dan I/O.
+# Dalam mode ini inferensi YOLO dan tracking ByteTrack dijalankan di beberapa worker process.
+# Frame tidak di-pickle: proses utama menyalin frame ke slot shared memory (ring beberapa slot per kamera),
+# lalu hanya mengirim nama segmen, offset, dan shape lewat antrian. Hasil dikembalikan sebagai array track
+# ringkas (N x 7 float32). Setiap kamera dipasangkan tetap ke satu worker (indeks kamera % jumlah worker)
+# sehingga state BYTETracker kamera tersebut selalu berada di proses yang sama dan ID tetap konsisten.
+# Slot yang masih dibaca worker (misalnya hasilnya terlambat) tidak pernah ditimpa; ring berpindah ke slot berikutnya.
+# Worker yang mati dijalankan ulang: slot yang masih dipegangnya dilepas dan tracker kamera-kameranya dimulai dari awal.
+# Jika worker terus mati melebihi max_restarts, infer() melempar RuntimeError agar program berhenti dengan jelas.
+
+EMPTY_TRACKS = np.zeros((0, 7), dtype=np.float32)
+
+
+class _FrameRing:
+    """Segmen shared memory berisi beberapa slot frame untuk satu kamera."""
+
+    def __init__(self, camera_name: str, slots: int):
+        self.camera_name = camera_name
+        self.slots = max(1, int(slots))
+        self.shm = None
+        self.slot_bytes = 0
+        self.generation = 0
+        self.busy = [False] * self.slots
+        self._next = 0
+
+    def acquire(self, nbytes: int):
+        """Mengambil slot kosong berikutnya; mengembalikan (generation, indeks) atau None jika semua slot sibuk."""
+        if nbytes > self.slot_bytes:
+            self._allocate(nbytes)
+        for _ in range(self.slots):
+            index = self._next
+            self._next = (self._next + 1) % self.slots
+            if not self.busy[index]:
+                self.busy[index] = True
+                return self.generation, index
+        return None
+
+    def release(self, generation: int, index: int):
+        if generation == self.generation:
+            self.busy[index] = False
+
+    def view(self, index: int, shape: tuple) -> np.ndarray:
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=index * self.slot_bytes)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def _allocate(self, nbytes: int):
+        """Membuat segmen baru yang cukup besar (misalnya resolusi stream naik); segmen lama dilepas."""
+        self.close()
+        self.slot_bytes = nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes * self.slots)
+        self.generation += 1
+        self.busy = [False] * self.slots
+
+
+def _worker_main(worker_index: int, model_cfg: dict, device: str, task_queue, result_queue):
+    """Proses worker: memuat model, lalu menjalankan inferensi + tracking untuk kamera yang dipasangkan padanya."""
+    from model_backend import load_detection_model
+    from tracking import CameraTracker
+
+    logger = logging.getLogger(f"RealTimeDetector.worker-{worker_index}")
+    logger.setLevel(logging.INFO)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - [worker-%(process)d] %(message)s'))
+        logger.addHandler(handler)
+
+    model = load_detection_model(model_cfg, device, logger)
+    trackers = {}
+    segments = {}   # nama kamera -> SharedMemory yang sedang di-attach
+    result_queue.put(("ready", worker_index, None))
+
+    running = True
+    while running:
+        task = task_queue.get()
+        if task is None:
+            break
+        # Ambil semua frame yang sudah menunggu agar kamera milik worker ini diinferensi dalam satu batch.
+        tasks = [task]
+        while True:
+            try:
+                task = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                running = False
+                break
+            tasks.append(task)
+
+        frames, valid = [], []
+        for camera_name, shm_name, offset, shape, seq in tasks:
+            segment = segments.get(camera_name)
+            if segment is None or segment.name != shm_name:
+                if segment is not None:
+                    segment.close()
+                try:
+                    segment = shared_memory.SharedMemory(name=shm_name)
+                except FileNotFoundError:
+                    # Segmen sudah diganti proses utama (resolusi berubah); frame ini dilewati.
+                    result_queue.put((camera_name, seq, EMPTY_TRACKS))
+                    continue
+                segments[camera_name] = segment
+            frames.append(np.ndarray(shape, dtype=np.uint8, buffer=segment.buf, offset=offset))
+            valid.append((camera_name, seq))
+
+        if frames:
+            results = model.predict(frames, verbose=False)
+            for (camera_name, seq), result in zip(valid, results):
+                tracker = trackers.get(camera_name)
+                if tracker is None:
+                    tracker = trackers[camera_name] = CameraTracker()
+                tracks = tracker.update(result)
+                result_queue.put((camera_name, seq, np.ascontiguousarray(tracks, dtype=np.float32)))
+            del frames, results
+
+    for segment in segments.values():
+        segment.close()
+
+
+class InferencePool:
+    """Pool worker process untuk inferensi + tracking dengan transfer frame lewat shared memory."""
+
+    def __init__(self, model_cfg: dict, device: str, camera_names: list, logger: logging.Logger,
+                 workers: int = 2, slots_per_camera: int = 2, timeout_sec: float = 5.0, max_restarts: int = 3):
+        self.logger = logger
+        self.model_cfg = model_cfg
+        self.device = device
+        self.timeout_sec = timeout_sec
+        self.max_restarts = max_restarts
+        self.num_workers = max(1, min(int(workers), len(camera_names)))
+        if self.num_workers < workers:
+            logger.info(f"Jumlah worker inferensi dibatasi menjadi {self.num_workers} (sama dengan jumlah kamera).")
+
+        # Kamera dipasangkan tetap ke satu worker agar state tracker-nya tidak berpindah proses.
+        self._worker_of = {name: index % self.num_workers for index, name in enumerate(camera_names)}
+        self._rings = {name: _FrameRing(name, slots_per_camera) for name in camera_names}
+        self._seq = itertools.count()
+        self._in_flight = {}   # seq -> (nama kamera, generation, indeks slot)
+        self._context = mp.get_context("spawn")
+        self._result_queue = self._context.Queue()
+        self._task_queues = [None] * self.num_workers
+        self._processes = [None] * self.num_workers
+        self._ready = set()    # indeks worker yang sudah selesai memuat model
+
+        # Statistik
+        self.frames_skipped = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def start(self):
+        """Menjalankan worker process; model dimuat di worker sementara proses utama membuka stream."""
+        for index in range(self.num_workers):
+            self._spawn(index)
+
+    def wait_ready(self):
+        """Menunggu sampai semua worker selesai memuat model."""
+        while len(self._ready) < self.num_workers:
+            try:
+                message = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if any(not process.is_alive() for process in self._processes):
+                    raise RuntimeError("Worker inferensi berhenti saat memuat model.")
+                continue
+            self._handle_message(message)
+        self.logger.info(f"🧠 {self.num_workers} worker inferensi siap (transfer frame lewat shared memory).")
+
+    def infer(self, items: list) -> dict:
+        """
+        Mengirim frame (nama kamera, frame) ke worker masing-masing dan menunggu hasilnya.
+        Mengembalikan dict nama kamera -> array track (N x 7) dalam koordinat frame yang dikirim.
+        """
+        self._check_workers()
+        # Hasil terlambat dari batch sebelumnya (dan sinyal 'ready' worker baru) diproses dulu agar slotnya lepas.
+        while True:
+            try:
+                self._handle_message(self._result_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        pending = set()
+        for camera_name, frame in items:
+            if self._worker_of[camera_name] not in self._ready:
+                # Worker kamera ini sedang dijalankan ulang dan belum selesai memuat model.
+                self.frames_skipped += 1
+                continue
+            ring = self._rings[camera_name]
+            slot = ring.acquire(frame.nbytes)
+            if slot is None:
+                # Semua slot kamera ini masih dipakai worker (hasil terlambat); frame dilewati.
+                self.frames_skipped += 1
+                continue
+            generation, index = slot
+            ring.view(index, frame.shape)[...] = frame
+            seq = next(self._seq)
+            self._in_flight[seq] = (camera_name, generation, index)
+            self._task_queues[self._worker_of[camera_name]].put(
+                (camera_name, ring.shm.name, index * ring.slot_bytes, frame.shape, seq)
+            )
+            pending.add(seq)
+
+        results = {}
+        deadline = time.monotonic() + self.timeout_sec
+        while pending:
+            remaining = deadline - time.monotonic()
+            try:
+                message = self._result_queue.get(timeout=max(remaining, 0.001))
+            except queue.Empty:
+                self.timeouts += 1
+                self.logger.warning(f"⚠️ {len(pending)} hasil inferensi belum kembali dalam {self.timeout_sec:g} detik.")
+                self._check_workers()
+                break
+            result = self._handle_message(message)
+            if result is not None and result[1] in pending:
+                camera_name, seq, tracks = result
+                pending.discard(seq)
+                results[camera_name] = tracks
+        return results
+
+    def stop(self):
+        """Menghentikan worker dan melepaskan semua segmen shared memory."""
+        for task_queue in self._task_queues:
+            if task_queue is not None:
+                task_queue.put(None)
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for ring in self._rings.values():
+            ring.close()
+
+    def _spawn(self, index: int):
+        """Menjalankan worker 'index' dengan antrian tugas baru (tugas untuk worker lama tidak dibawa)."""
+        old_queue = self._task_queues[index]
+        if old_queue is not None:
+            old_queue.cancel_join_thread()
+            old_queue.close()
+        self._task_queues[index] = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main, name=f"inference-{index + 1}",
+            args=(index, self.model_cfg, self.device, self._task_queues[index], self._result_queue), daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _handle_message(self, message):
+        """Memproses satu pesan dari worker; mengembalikan (nama kamera, seq, tracks) untuk hasil inferensi."""
+        camera_name, seq, tracks = message
+        if tracks is None:
+            # Sinyal ("ready", indeks worker, None): worker selesai memuat model.
+            self._ready.add(seq)
+            return None
+        slot = self._in_flight.pop(seq, None)
+        if slot is not None:
+            self._rings[slot[0]].release(slot[1], slot[2])
+        return camera_name, seq, tracks
+
+    def _check_workers(self):
+        """Menjalankan ulang worker yang mati; melempar RuntimeError jika batas max_restarts terlampaui."""
+        for index, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            self.logger.critical(f"❌ Worker {process.name} berhenti (exit code {process.exitcode}).")
+            if self.restarts >= self.max_restarts:
+                raise RuntimeError(
+                    f"Worker inferensi {process.name} berhenti dan batas {self.max_restarts} kali restart terlampaui."
+                )
+            self.restarts += 1
+            self._ready.discard(index)
+            # Slot yang dipegang worker mati tidak akan pernah dikembalikan; lepaskan sekarang.
+            for seq, (camera_name, generation, slot_index) in list(self._in_flight.items()):
+                if self._worker_of[camera_name] == index:
+                    del self._in_flight[seq]
+                    self._rings[camera_name].release(generation, slot_index)
+            cameras = [name for name, worker in self._worker_of.items() if worker == index]
+            self.logger.warning(
+                f"🔁 Menjalankan ulang worker {process.name} (restart ke-{self.restarts}/{self.max_restarts}); "
+                f"track kamera {', '.join(cameras)} dimulai dari awal."
+            )
+            self._spawn(index)
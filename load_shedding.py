@@ -0,0 +1,102 @@
+import logging
+import time
+
+import numpy as np
+
+# Pengendali Beban Adaptif (LoadShedder)
+
+# Jika beberapa kamera ramai bersamaan, latensi per frame di host CPU dapat terus naik sehingga notifikasi terlambat.
+# LoadShedder mengamati latensi end-to-end frame (sejak ditangkap sampai selesai diproses) dalam jendela waktu,
+# lalu membandingkan p95-nya dengan target. Jika melebihi target, kualitas diturunkan satu langkah sesuai urutan
+# 'steps' (kumulatif): imgsz inferensi diperkecil, sebagian frame dilewati, penyimpanan framerecord dimatikan,
+# lalu kualitas JPEG diturunkan. Jika p95 sudah jauh di bawah target (restore_ratio) selama minimal hold_sec,
+# langkah terakhir dikembalikan satu per satu. Setiap perubahan mode dicatat di log dan metrik.
+# LoadShedder hanya menyimpan state; RealTimeDetector yang menerapkan setiap langkah.
+
+SHED_STEPS = ("imgsz", "frame_skip", "framerecord", "jpeg_quality")
+
+
+class LoadShedder:
+    """Menentukan tingkat degradasi berdasarkan latensi frame terhadap target."""
+
+    def __init__(self, logger: logging.Logger, target_latency_ms: float = 250.0, window_sec: float = 5.0,
+                 restore_ratio: float = 0.6, hold_sec: float = 15.0, steps: tuple = SHED_STEPS,
+                 skip_frames: int = 1):
+        self.logger = logger
+        self.target = target_latency_ms / 1000.0
+        self.window_sec = window_sec
+        self.restore_ratio = restore_ratio
+        self.hold_sec = hold_sec
+        self.steps = tuple(step for step in steps if step in SHED_STEPS)
+        self.skip_frames = max(1, int(skip_frames))
+
+        self.level = 0
+        self._latencies = []
+        self._window_started = time.monotonic()
+        self._last_change = self._window_started
+        self._skip_counters = {}   # penghitung frame_skip per kamera
+        self.last_p95 = 0.0
+
+        # Statistik
+        self.mode_changes = 0
+        self.frames_skipped = 0
+
+    def active(self, step: str) -> bool:
+        """True jika langkah degradasi 'step' sedang aktif."""
+        return step in self.steps[:self.level]
+
+    def mode(self) -> str:
+        """Nama mode saat ini (untuk log), misalnya 'normal' atau 'imgsz+frame_skip'."""
+        return "+".join(self.steps[:self.level]) or "normal"
+
+    def record(self, latency_sec: float):
+        self._latencies.append(latency_sec)
+
+    def skip_frame(self, camera: str) -> bool:
+        """
+        Dengan langkah 'frame_skip' aktif, hanya satu dari setiap (skip_frames + 1) frame sebuah kamera yang diproses.
+        Penghitung terpisah per kamera sehingga setiap stream kehilangan porsi frame yang sama.
+        """
+        if not self.active("frame_skip"):
+            return False
+        counter = (self._skip_counters.get(camera, 0) + 1) % (self.skip_frames + 1)
+        self._skip_counters[camera] = counter
+        if counter == 0:
+            return False
+        self.frames_skipped += 1
+        return True
+
+    def update(self, now: float) -> bool:
+        """Mengevaluasi jendela latensi jika sudah waktunya; mengembalikan True jika tingkat degradasi berubah."""
+        if now - self._window_started < self.window_sec:
+            return False
+        latencies, self._latencies = self._latencies, []
+        self._window_started = now
+        if not latencies:
+            return False
+        self.last_p95 = float(np.percentile(latencies, 95))
+
+        previous = self.level
+        if self.last_p95 > self.target and self.level < len(self.steps):
+            self.level += 1
+        elif (self.last_p95 < self.target * self.restore_ratio and self.level > 0
+              and now - self._last_change >= self.hold_sec):
+            self.level -= 1
+        if self.level == previous:
+            return False
+
+        self._last_change = now
+        self.mode_changes += 1
+        if self.level > previous:
+            self.logger.warning(
+                f"🐢 Latensi frame p95 {self.last_p95 * 1000:.0f} ms melebihi target {self.target * 1000:.0f} ms. "
+                f"Menurunkan kualitas dengan langkah '{self.steps[previous]}' (mode: {self.mode()}).",
+                extra={"event": "load_shed", "mode": self.mode(), "p95_ms": round(self.last_p95 * 1000)},
+            )
+        else:
+            self.logger.info(
+                f"🐇 Latensi frame p95 {self.last_p95 * 1000:.0f} ms sudah turun. "
+                f"Langkah '{self.steps[self.level]}' dicabut (mode: {self.mode()}).",
+                extra={"event": "load_shed", "mode": self.mode(), "p95_ms": round(self.last_p95 * 1000)},
+            )
+        return True
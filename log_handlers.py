@@ -0,0 +1,142 @@
+import copy
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, RotatingFileHandler, TimedRotatingFileHandler
+
+# Handler Logging (rotasi, kompresi, JSONL, dan pembatas laju)
+
+# setup_logger (rtspv2.py) memasang QueueHandler pada logger sehingga thread deteksi dan worker hanya memasukkan
+# record ke antrian; penulisan ke konsol dan disk dilakukan QueueListener di thread terpisah.
+# File log teks dan stream JSONL dirotasi berdasarkan ukuran ('size') atau waktu ('time'); file hasil rotasi
+# dikompresi gzip. Setiap baris JSONL berisi waktu, level, pesan, serta field terstruktur dari argumen 'extra'
+# (misalnya event, camera, track_id) agar mudah diolah mesin.
+# RateLimitFilter membatasi pesan berulang dengan 'rate_limit_key' yang sama (misalnya peringatan 'Frame kosong'
+# per kamera saat kamera mati); jumlah pesan yang disembunyikan ditambahkan ke pesan berikutnya.
+
+ROTATION_MODES = ("size", "time")
+
+_GZIP_SUFFIX = ".gz"
+
+# Atribut bawaan LogRecord; atribut lain berasal dari 'extra' dan ditulis sebagai field JSONL.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "rate_limit_key"}
+
+
+def _gzip_rotator(source: str, dest: str):
+    """Mengompresi file log hasil rotasi ke 'dest' (.gz) lalu menghapus file aslinya."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class _TimedRotatingHandler(TimedRotatingFileHandler):
+    """
+    TimedRotatingFileHandler yang hanya menghapus backup miliknya sendiri.
+    Bawaan Python mencocokkan semua file '<stem>.<tanggal>...' di direktori log, sehingga events.log dapat
+    menghapus backup events.jsonl; di sini hanya '<nama file>.<tanggal>[.gz]' yang dihitung sebagai backup.
+    """
+
+    def getFilesToDelete(self):
+        dir_name, base_name = os.path.split(self.baseFilename)
+        prefix = base_name + "."
+        result = []
+        for file_name in os.listdir(dir_name):
+            if not file_name.startswith(prefix):
+                continue
+            suffix = file_name[len(prefix):]
+            if self.namer is not None and suffix.endswith(_GZIP_SUFFIX):
+                suffix = suffix[:-len(_GZIP_SUFFIX)]
+            if self.extMatch.fullmatch(suffix):
+                result.append(os.path.join(dir_name, file_name))
+        if len(result) < self.backupCount:
+            return []
+        result.sort()
+        return result[:len(result) - self.backupCount]
+
+
+def build_file_handler(path: str, rotation: str = "size", max_mb: float = 50, when: str = "midnight",
+                       backup_count: int = 7, compress: bool = True) -> logging.Handler:
+    """Membuat file handler dengan rotasi ukuran/waktu dan (opsional) kompresi gzip file hasil rotasi."""
+    if rotation == "time":
+        handler = _TimedRotatingHandler(path, when=when, backupCount=backup_count, encoding="utf-8")
+    else:
+        handler = RotatingFileHandler(path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backup_count,
+                                      encoding="utf-8")
+    if compress:
+        handler.namer = lambda name: name + _GZIP_SUFFIX
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler yang mempertahankan traceback di exc_text (bawaan Python menggabungkannya ke pesan dan
+    membuang exc_info), sehingga JsonlFormatter dapat menulisnya sebagai field 'exception' terpisah.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Salinan agar handler lain pada logger yang sama tetap menerima record asli.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # exc_info (objek traceback) tidak aman dibawa lintas thread/proses; simpan sebagai teks.
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonlFormatter(logging.Formatter):
+    """Memformat setiap record sebagai satu objek JSON per baris."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        # Record dari StructuredQueueHandler hanya membawa traceback sebagai teks (exc_text).
+        exception = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exception:
+            entry["exception"] = exception
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Meloloskan paling banyak satu record per 'rate_limit_key' setiap interval_sec."""
+
+    def __init__(self, interval_sec: float = 60.0):
+        super().__init__()
+        self.interval_sec = interval_sec
+        self._lock = threading.Lock()
+        self._last_emitted = {}
+        self._suppressed = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit_key", None)
+        if key is None or self.interval_sec <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_emitted.get(key)
+            if last is not None and now - last < self.interval_sec:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last_emitted[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} pesan serupa disembunyikan dalam {self.interval_sec:g} detik terakhir)"
+            record.args = None
+            record.suppressed = suppressed
+        return True
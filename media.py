@@ -0,0 +1,47 @@
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Encoding Gambar (encode_jpeg, write_atomic)
+
+# Setiap gambar bukti di-encode ke JPEG di memori tepat satu kali.
+# Buffer yang sama dipakai untuk penulisan ke disk dan untuk upload ke API (WhatsApp, dll.),
+# sehingga tidak ada encode ganda maupun membaca ulang file dari disk.
+# Penulisan ke disk dilakukan secara atomik (file sementara lalu rename) agar pembaca tidak pernah
+# melihat file JPEG yang setengah tertulis.
+
+MIN_JPEG_QUALITY = 40
+
+
+def encode_jpeg(img: np.ndarray, quality: int = 95, max_width: int = 0, max_height: int = 0, max_bytes: int = 0) -> bytes:
+    """
+    Meng-encode gambar ke JPEG di memori.
+    Gambar diperkecil jika melebihi max_width/max_height (0 = tanpa batas); jika hasilnya lebih besar dari
+    max_bytes (0 = tanpa batas), kualitas diturunkan bertahap hingga MIN_JPEG_QUALITY.
+    """
+    height, width = img.shape[:2]
+    scale = 1.0
+    if max_width and width > max_width:
+        scale = min(scale, max_width / width)
+    if max_height and height > max_height:
+        scale = min(scale, max_height / height)
+    if scale < 1.0:
+        img = cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+    while True:
+        ok, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        if not ok:
+            raise ValueError("Gagal meng-encode gambar ke JPEG.")
+        if not max_bytes or buffer.nbytes <= max_bytes or quality <= MIN_JPEG_QUALITY:
+            return buffer.tobytes()
+        quality = max(MIN_JPEG_QUALITY, quality - 10)
+
+
+def write_atomic(path: Path, data: bytes):
+    """Menulis data ke file sementara di folder yang sama, lalu me-rename-nya ke path tujuan."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
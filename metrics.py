@@ -0,0 +1,221 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrik Pipeline (MetricsRegistry) dan Endpoint Prometheus (MetricsServer)
+
+# MetricsRegistry memakai antarmuka yang sama dengan stage timer di profiling.py (measure/record/observe),
+# sehingga dapat dipasang langsung sebagai stage_timer RealTimeDetector.
+# Setiap sampel hanya menaikkan satu bucket histogram (bisect pada batas bucket tetap), tanpa menyimpan sampel,
+# sehingga overhead-nya cukup kecil untuk selalu aktif.
+# Nilai yang sudah dihitung komponen lain (FPS, reconnect, antrian, API, track aktif) tidak diduplikasi:
+# nilainya dibaca oleh 'collector' hanya saat endpoint /metrics di-scrape.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Nama metrik -> (tipe, keterangan)
+METRIC_HELP = {
+    "stage_latency_seconds": ("histogram", "Durasi setiap tahap pipeline."),
+    "frame_age_seconds": ("histogram", "Umur frame (sejak ditangkap) saat mulai diinferensi."),
+    "camera_fps": ("gauge", "FPS efektif per kamera."),
+    "frames_captured_total": ("counter", "Jumlah frame yang diterima dari sumber video."),
+    "frames_dropped_total": ("counter", "Jumlah frame yang dibuang sebelum diproses."),
+    "frames_gated_total": ("counter", "Jumlah frame yang dilewati motion gate."),
+    "frames_propagated_total": ("counter", "Jumlah frame yang box track-nya dipropagasi tanpa detektor."),
+    "reconnects_total": ("counter", "Jumlah reconnect sumber video."),
+    "tracks_active": ("gauge", "Jumlah track aktif di TrackStore."),
+    "notification_queue_depth": ("gauge", "Jumlah event yang menunggu di antrian notifikasi."),
+    "notification_events_total": ("counter", "Event notifikasi menurut hasil (enqueued, dropped, coalesced)."),
+    "api_requests_total": ("counter", "Request API per layanan menurut hasil (success, failure, retry)."),
+    "api_latency_seconds": ("summary", "Latensi request API per layanan."),
+    "load_shed_level": ("gauge", "Jumlah langkah degradasi pengendali beban yang sedang aktif (0 = normal)."),
+    "load_shed_mode_changes_total": ("counter", "Jumlah perubahan mode pengendali beban."),
+    "load_shed_frames_skipped_total": ("counter", "Jumlah frame (total semua kamera) yang dilewati pengendali beban."),
+    "outbox_pending": ("gauge", "Jumlah notifikasi yang menunggu di outbox."),
+    "outbox_size_bytes": ("gauge", "Ukuran data notifikasi di outbox."),
+    "outbox_dropped_total": ("counter", "Jumlah notifikasi yang dibuang karena outbox penuh."),
+    "outbox_rejected_total": ("counter", "Jumlah notifikasi di outbox yang ditolak permanen oleh server (HTTP 4xx)."),
+}
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Histogram:
+    """Histogram kumulatif dengan batas bucket tetap (format Prometheus)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # bucket terakhir = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> tuple:
+        return list(self.counts), self.sum, self.count
+
+
+class MetricsRegistry:
+    """Kumpulan histogram dan collector yang dirender dalam format teks Prometheus."""
+
+    def __init__(self, prefix: str = "detector", buckets: tuple = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}   # (nama, labels) -> Histogram
+        self._collectors = []
+        self._last_summary = {}
+
+    # --- Antarmuka stage timer ---
+
+    @contextmanager
+    def measure(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_latency_seconds", time.perf_counter() - started, stage=stage)
+
+    def record(self, stage: str, seconds: float):
+        self.observe("stage_latency_seconds", seconds, stage=stage)
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    # --- Collector dan render ---
+
+    def add_collector(self, collector):
+        """
+        Mendaftarkan fungsi yang dipanggil saat scrape.
+        Fungsi mengembalikan daftar (nama, labels dict, nilai); untuk tipe 'summary' nilainya tuple (sum, count).
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Merender semua metrik dalam format teks Prometheus (versi 0.0.4)."""
+        with self._lock:
+            histograms = {key: histogram.snapshot() for key, histogram in self._histograms.items()}
+
+        samples = {}
+        for (name, labels), snapshot in histograms.items():
+            samples.setdefault(name, []).append((labels, snapshot))
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                samples.setdefault(name, []).append((tuple(sorted(labels.items())), value))
+
+        lines = []
+        for name in sorted(samples):
+            metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for labels, value in samples[name]:
+                if metric_type == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {total:.6f}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+                elif metric_type == "summary":
+                    total, count = value
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {total:.6f}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{full_name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self) -> dict:
+        """
+        Ringkasan latensi per tahap sejak pemanggilan sebelumnya (untuk log berkala):
+        jumlah sampel, rata-rata, dan batas atas bucket yang memuat p95 (ms).
+        """
+        with self._lock:
+            current = {dict(labels)["stage"]: histogram.snapshot()
+                       for (name, labels), histogram in self._histograms.items() if name == "stage_latency_seconds"}
+
+        summary = {}
+        for stage, (counts, total, count) in current.items():
+            prev_counts, prev_total, prev_count = self._last_summary.get(stage, ([0] * len(counts), 0.0, 0))
+            window = [c - p for c, p in zip(counts, prev_counts)]
+            window_count = count - prev_count
+            if window_count <= 0:
+                continue
+            target, cumulative, p95 = window_count * 0.95, 0, float("inf")
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), window):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    p95 = bound
+                    break
+            summary[stage] = {
+                "count": window_count,
+                "mean_ms": (total - prev_total) / window_count * 1000,
+                "p95_ms": p95 * 1000,
+            }
+        self._last_summary = current
+        return summary
+
+
+class MetricsServer:
+    """Server HTTP kecil yang menyajikan MetricsRegistry di /metrics."""
+
+    def __init__(self, registry: MetricsRegistry, logger: logging.Logger, host: str = "127.0.0.1", port: int = 9100):
+        self.registry = registry
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        """Menjalankan server HTTP di thread daemon."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404, "Gunakan /metrics")
+                    return
+                body = server.registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"📈 Endpoint metrik Prometheus aktif di http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
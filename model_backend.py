@@ -0,0 +1,145 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import yaml
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+# Backend Inferensi Model (DetectionModel)
+
+# 'model.backend' memilih runtime inferensi: 'torch' (PyTorch, perilaku lama), 'onnxruntime', atau 'openvino'.
+# Untuk ONNX Runtime/OpenVINO, model .pt diekspor sekali lalu disimpan di 'model.cache_dir'; pemanggilan
+# berikutnya langsung memakai artefak cache (diekspor ulang jika file .pt lebih baru).
+# Ekspor memakai shape dinamis agar ukuran batch (jumlah kamera) dan imgsz tetap bisa berubah.
+# Opsional INT8: kuantisasi statis dengan frame kalibrasi dari folder 'model.int8_calibration'.
+# Semua backend dimuat lewat ultralytics YOLO sehingga hasil predict() tetap berupa Results yang sama:
+# ByteTrack dan filter box di RealTimeDetector berjalan identik di semua backend.
+# ultralytics (dan torch) baru diimpor saat model dimuat, sehingga mengimpor modul ini tetap murah
+# dan impor berat dapat berjalan di thread pemuat model bersamaan dengan pembukaan stream.
+
+BACKENDS = ("torch", "onnxruntime", "openvino")
+EXPORT_FORMATS = {"onnxruntime": "onnx", "openvino": "openvino"}
+
+
+class DetectionModel:
+    """Model YOLO dengan backend pilihan; antarmuka predict() sama dengan YOLO."""
+
+    def __init__(self, model: "YOLO", backend: str, imgsz: int, device: str):
+        self.model = model
+        self.backend = backend
+        self.imgsz = imgsz
+        self.device = device
+
+    def predict(self, frames: list, verbose: bool = False, **kwargs) -> list:
+        return self.model.predict(frames, imgsz=self.imgsz, device=self.device, verbose=verbose, **kwargs)
+
+    def warmup(self, runs: int = 1):
+        """Inferensi pada gambar kosong agar predictor, alokasi memori, dan kernel siap sebelum frame pertama."""
+        blank = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.predict([blank])
+
+
+def load_detection_model(model_cfg: dict, device: str, logger: logging.Logger) -> DetectionModel:
+    """Memuat model sesuai 'model.backend', mengekspor ke cache bila perlu, lalu menjalankan warm-up."""
+    from ultralytics import YOLO
+
+    backend = model_cfg.get('backend', 'torch')
+    if backend not in BACKENDS:
+        logger.error(f"Backend model '{backend}' tidak valid. Menggunakan 'torch' sebagai fallback.")
+        backend = 'torch'
+    path = model_cfg['path']
+    imgsz = int(model_cfg.get('imgsz', 640))
+    threads = int(model_cfg.get('threads', 0))
+
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+    if backend == 'torch':
+        model = YOLO(path)
+        model.to(device)
+        artifact = path
+    else:
+        artifact = _export_cached(model_cfg, backend, imgsz, logger)
+        model = YOLO(str(artifact), task='detect')
+
+    detection_model = DetectionModel(model, backend, imgsz, device)
+    warmup_runs = int(model_cfg.get('warmup_runs', 1))
+    if warmup_runs > 0 or threads > 0:
+        # Predictor ultralytics baru dibuat saat predict pertama; warm-up minimal sekali jika thread perlu diatur.
+        detection_model.warmup(max(warmup_runs, 1))
+    if threads > 0 and backend != 'torch':
+        _limit_runtime_threads(model, backend, artifact, threads, logger)
+
+    logger.info(f"Model '{artifact}' dimuat dengan backend '{backend}' (imgsz {imgsz}) ke perangkat '{device}'.")
+    return detection_model
+
+
+def _export_cached(model_cfg: dict, backend: str, imgsz: int, logger: logging.Logger) -> Path:
+    """Mengekspor model .pt ke format backend dan menyimpannya di cache; mengembalikan path artefak."""
+    source = Path(model_cfg['path'])
+    int8 = bool(model_cfg.get('int8', False))
+    export_format = EXPORT_FORMATS[backend]
+    cache_dir = Path(model_cfg.get('cache_dir', './data/models'))
+    name = f"{source.stem}_{imgsz}{'_int8' if int8 else ''}"
+    cached = cache_dir / (f"{name}.onnx" if export_format == "onnx" else f"{name}_openvino_model")
+
+    if cached.exists() and (not source.exists() or cached.stat().st_mtime >= source.stat().st_mtime):
+        return cached
+
+    from ultralytics import YOLO
+
+    logger.info(f"📦 Mengekspor '{source}' ke format {export_format}{' INT8' if int8 else ''} (sekali saja, disimpan di {cache_dir})...")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    model = YOLO(str(source))
+    export_args = {"format": export_format, "imgsz": imgsz, "dynamic": True, "device": "cpu"}
+    if int8:
+        export_args["int8"] = True
+        export_args["data"] = str(_calibration_dataset(model_cfg, model.names, cache_dir))
+    exported = Path(model.export(**export_args))
+
+    if cached.is_dir():
+        shutil.rmtree(cached)
+    elif cached.exists():
+        cached.unlink()
+    shutil.move(str(exported), str(cached))
+    return cached
+
+
+def _calibration_dataset(model_cfg: dict, names: dict, cache_dir: Path) -> Path:
+    """Membuat file dataset YAML ultralytics yang menunjuk ke folder frame kalibrasi INT8."""
+    calibration_dir = Path(model_cfg.get('int8_calibration', './data/calibration')).resolve()
+    if not calibration_dir.is_dir() or not any(calibration_dir.iterdir()):
+        raise FileNotFoundError(f"Folder frame kalibrasi INT8 '{calibration_dir}' tidak ditemukan atau kosong.")
+    dataset = {"path": str(calibration_dir), "train": ".", "val": ".", "names": dict(names)}
+    dataset_path = cache_dir / "calibration.yaml"
+    with open(dataset_path, 'w') as f:
+        yaml.safe_dump(dataset, f)
+    return dataset_path
+
+
+def _limit_runtime_threads(model: "YOLO", backend: str, artifact: Path, threads: int, logger: logging.Logger):
+    """Membuat ulang sesi ONNX Runtime / model OpenVINO terkompilasi dengan jumlah thread yang dibatasi."""
+    autobackend = getattr(model.predictor, 'model', None)
+    # Ultralytics versi baru menyimpan runtime di autobackend.backend; versi lama langsung di autobackend.
+    runtime = getattr(autobackend, 'backend', autobackend)
+    try:
+        if backend == 'onnxruntime':
+            import onnxruntime
+            session = runtime.session
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            runtime.session = onnxruntime.InferenceSession(str(artifact), options, providers=session.get_providers())
+        else:
+            import openvino as ov
+            config = {"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": threads}
+            core = ov.Core()
+            xml = next(Path(artifact).glob("*.xml"))
+            runtime.ov_compiled_model = core.compile_model(core.read_model(xml), "CPU", config)
+    except (AttributeError, ImportError, StopIteration) as e:
+        logger.warning(f"⚠️ Jumlah thread backend '{backend}' tidak dapat diatur ({e}); memakai pengaturan bawaan runtime.")
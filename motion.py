@@ -0,0 +1,81 @@
+import cv2
+import numpy as np
+
+# Motion Gate (MotionGate)
+
+# Pre-filter murah sebelum inferensi YOLO untuk kamera yang lebih sering menyorot area kosong.
+# Frame diperkecil dan diubah ke grayscale, lalu dibandingkan dengan frame sebelumnya ('diff')
+# atau dengan model latar belakang ('mog2'). Hanya piksel di dalam ROI yang dihitung.
+# Jika tidak ada perubahan, inferensi dilewati; 'keepalive_sec' memaksa inferensi berkala agar
+# state ByteTrack dan waktu tracked_persons tetap diperbarui meskipun scene diam.
+
+MOTION_METHODS = ("diff", "mog2")
+
+
+class MotionGate:
+    """Menentukan apakah sebuah frame perlu diinferensi berdasarkan perubahan gambar."""
+
+    def __init__(self, method: str = "diff", downscale_width: int = 160, pixel_threshold: int = 25,
+                 min_area_ratio: float = 0.002, keepalive_sec: float = 1.0):
+        self.method = method if method in MOTION_METHODS else "diff"
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_area_ratio = min_area_ratio
+        self.keepalive_sec = keepalive_sec
+
+        self._prev_gray = None
+        self._small_mask = None
+        self._small_mask_source = None
+        self._small_mask_shape = None
+        self._mask_area = 0
+        self._bg_subtractor = None
+        self._last_inference = None
+
+    def should_infer(self, frame: np.ndarray, roi_mask: np.ndarray, now: float) -> bool:
+        """Mengembalikan True jika ada gerakan di ROI atau interval keep-alive sudah terlewati."""
+        moved = self._detect_motion(frame, roi_mask)
+        keepalive_due = self._last_inference is None or now - self._last_inference >= self.keepalive_sec
+        if moved or keepalive_due:
+            self._last_inference = now
+            return True
+        return False
+
+    def _detect_motion(self, frame: np.ndarray, roi_mask: np.ndarray) -> bool:
+        """Menghitung rasio piksel berubah di dalam ROI pada salinan frame yang diperkecil."""
+        height, width = frame.shape[:2]
+        small_w = min(self.downscale_width, width)
+        small_h = max(1, int(height * small_w / width))
+        small = cv2.resize(frame, (small_w, small_h), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        self._update_mask(roi_mask, (small_h, small_w))
+
+        if self.method == "mog2":
+            if self._bg_subtractor is None:
+                self._bg_subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+            changed = self._bg_subtractor.apply(gray)
+        else:
+            if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+                self._prev_gray = gray
+                return True
+            diff = cv2.absdiff(gray, self._prev_gray)
+            self._prev_gray = gray
+            _, changed = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+
+        if self._small_mask is not None:
+            changed = cv2.bitwise_and(changed, self._small_mask)
+        return cv2.countNonZero(changed) >= self.min_area_ratio * self._mask_area
+
+    def _update_mask(self, roi_mask: np.ndarray, shape: tuple):
+        """Memperkecil ROI mask ke ukuran frame kecil (hanya jika mask atau ukurannya berubah)."""
+        if roi_mask is self._small_mask_source and shape == self._small_mask_shape:
+            return
+        self._small_mask_source = roi_mask
+        self._small_mask_shape = shape
+        if roi_mask is None:
+            self._small_mask = None
+            self._mask_area = shape[0] * shape[1]
+        else:
+            self._small_mask = cv2.resize(roi_mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+            self._mask_area = max(1, cv2.countNonZero(self._small_mask))
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+# Antrian Notifikasi Terbatas (EventQueue)
+
+# Menggantikan ThreadPoolExecutor.submit yang antriannya tidak terbatas: saat API lambat,
+# frame resolusi penuh bisa menumpuk di RAM. Event deteksi kini masuk ke antrian dengan kapasitas tetap.
+# Jika antrian penuh, diterapkan kebijakan 'drop_oldest', 'drop_newest', atau 'coalesce'
+# (event digabung dengan event tertunda dari kamera yang sama).
+# Setiap event hanya membawa gambar yang benar-benar dibutuhkan oleh sink yang aktif.
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "coalesce")
+
+
+class DetectionEvent:
+    """Data satu deteksi valid yang akan disimpan dan dikirim oleh worker notifikasi."""
+
+    __slots__ = ("camera_name", "track_id", "confidence", "detected_at", "capture_img", "framerecord_img",
+                 "merged_track_ids", "enqueued_at")
+
+    def __init__(self, camera_name: str, track_id: int, confidence: float, capture_img: np.ndarray,
+                 framerecord_img: np.ndarray = None):
+        self.camera_name = camera_name
+        self.track_id = track_id
+        self.confidence = confidence
+        self.detected_at = datetime.now()
+        self.capture_img = capture_img
+        self.framerecord_img = framerecord_img
+        self.merged_track_ids = []
+        self.enqueued_at = None
+
+
+class EventQueue:
+    """Antrian event berkapasitas tetap dengan kebijakan overflow dan statistik antrian."""
+
+    def __init__(self, maxsize: int = 32, overflow_policy: str = "drop_oldest"):
+        self.maxsize = max(1, int(maxsize))
+        self.overflow_policy = overflow_policy if overflow_policy in OVERFLOW_POLICIES else "drop_oldest"
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Statistik antrian
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self._wait_total = 0.0
+        self._wait_count = 0
+        self._wait_max = 0.0
+
+    def put(self, event: DetectionEvent) -> bool:
+        """Menambahkan event tanpa pernah memblokir loop deteksi. Mengembalikan False jika event dibuang."""
+        with self._cond:
+            if len(self._events) >= self.maxsize:
+                if self.overflow_policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.overflow_policy == "coalesce" and self._coalesce(event):
+                    self._cond.notify()
+                    return True
+                self._events.popleft()
+                self.dropped += 1
+
+            event.enqueued_at = time.monotonic()
+            self._events.append(event)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._events))
+            self._cond.notify()
+            return True
+
+    def _coalesce(self, event: DetectionEvent) -> bool:
+        """Mengganti event tertunda terbaru dari kamera yang sama dengan event baru (gambar terbaru dipakai)."""
+        for index in range(len(self._events) - 1, -1, -1):
+            pending = self._events[index]
+            if pending.camera_name == event.camera_name:
+                event.merged_track_ids = pending.merged_track_ids + [pending.track_id]
+                event.enqueued_at = pending.enqueued_at
+                self._events[index] = event
+                self.coalesced += 1
+                return True
+        return False
+
+    def get(self, timeout: float = 1.0):
+        """Mengambil event berikutnya; mengembalikan None jika antrian kosong atau sudah ditutup."""
+        with self._cond:
+            if not self._events and not self._closed:
+                self._cond.wait(timeout)
+            if not self._events:
+                return None
+            event = self._events.popleft()
+            waited = time.monotonic() - event.enqueued_at
+            self._wait_total += waited
+            self._wait_count += 1
+            self._wait_max = max(self._wait_max, waited)
+            return event
+
+    def close(self):
+        """Menandai antrian selesai; worker menghabiskan sisa event lalu berhenti."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self, reset_wait: bool = True) -> dict:
+        """Mengembalikan kedalaman antrian, waktu tunggu, dan penghitung event dibuang/digabung."""
+        with self._cond:
+            stats = {
+                "depth": len(self._events),
+                "max_depth": self.max_depth,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "avg_wait_sec": self._wait_total / self._wait_count if self._wait_count else 0.0,
+                "max_wait_sec": self._wait_max,
+            }
+            if reset_wait:
+                self._wait_total, self._wait_count, self._wait_max = 0.0, 0, 0.0
+            return stats
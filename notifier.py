@@ -0,0 +1,384 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from outbox import Outbox
+
+# Subsistem Notifikasi (Notifier)
+
+# Semua request API melewati satu requests.Session bersama dengan connection pool keep-alive,
+# sehingga koneksi TCP/TLS dipakai ulang antar notifikasi. Session (dan impor requests) baru dibuat
+# saat notifikasi pertama dikirim di thread pengirim, bukan saat startup.
+# Retry tidak lagi menggunakan time.sleep di worker thread: percobaan berikutnya dijadwalkan oleh
+# RetryScheduler (satu thread timer) lalu dikirim kembali ke pool pengirim saat waktunya tiba.
+# Event log server dikumpulkan (micro-batch) dan dikirim sekaligus saat jumlahnya mencapai
+# batch_size atau setelah flush_interval_sec berlalu.
+# Jika outbox aktif (outbox.py), send() dan log_event() hanya menulis ke outbox SQLite; pengirim latar belakang
+# mengambil notifikasi yang jatuh tempo secara bulk (event log server digabung per batch_size) dan mencoba ulang
+# tanpa batas jumlah percobaan dengan jeda eksponensial (maksimal max_backoff_sec), termasuk setelah restart.
+# Respons HTTP 4xx (selain 408 dan 429) dianggap penolakan permanen dan tidak dicoba ulang; jika satu batch
+# event ditolak, event dikirim ulang satu per satu agar hanya event yang bermasalah yang dibuang.
+
+# Status 4xx yang masih layak dicoba ulang (timeout dan rate limit di sisi server).
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+def _is_permanent(error) -> bool:
+    """True jika server menolak request secara permanen (HTTP 4xx selain 408/429)."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return False
+    return 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS
+
+
+class RetryScheduler:
+    """Satu thread yang menjalankan callback pada waktu tertentu (pengganti sleep di worker thread)."""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="retry-scheduler", daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, callback):
+        """Menjadwalkan callback untuk dijalankan setelah 'delay' detik."""
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), callback))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception as e:
+                # Satu callback yang gagal (misalnya executor sudah ditutup) tidak boleh menghentikan thread scheduler.
+                self.logger.error(f"Error pada callback retry terjadwal: {e}", exc_info=True)
+
+
+class _Request:
+    """Satu request API beserta jumlah percobaan yang sudah dilakukan."""
+
+    __slots__ = ("url", "service_name", "json_data", "files", "attempt")
+
+    def __init__(self, url: str, service_name: str, json_data: dict, files: dict):
+        self.url = url
+        self.service_name = service_name
+        self.json_data = json_data
+        self.files = files
+        self.attempt = 0
+
+
+LOG_SERVICE = "ZAI Log Server"
+
+
+class Notifier:
+    """Pengirim notifikasi API dengan session pooled, retry terjadwal, dan batching log server."""
+
+    def __init__(self, api_cfg: dict, logger: logging.Logger, outbox_cfg: dict = None):
+        self.logger = logger
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.update_config(api_cfg)
+
+        pool_size = api_cfg.get('http', {}).get('pool_size', 10)
+        self.pool_size = pool_size
+
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="http-sender")
+        self._scheduler = RetryScheduler(logger)
+
+        self._batch = []
+        self._batch_lock = threading.Lock()
+
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+        # Outbox persisten (opsional) dengan satu thread pengirim.
+        outbox_cfg = outbox_cfg or {}
+        self.outbox = None
+        if outbox_cfg.get('enabled', False):
+            self.outbox = Outbox(
+                outbox_cfg.get('path', './data/outbox.db'), logger,
+                max_rows=outbox_cfg.get('max_rows', 10000),
+                max_mb=outbox_cfg.get('max_mb', 500),
+            )
+            self._outbox_wakeup = threading.Event()
+            self._outbox_stop = threading.Event()
+            self._outbox_thread = threading.Thread(target=self._run_outbox, name="outbox-sender", daemon=True)
+            self._outbox_thread.start()
+
+    # --- API publik ---
+
+    def send(self, url: str, service_name: str, json_data: dict = None, files: dict = None):
+        """
+        Mengirim request secara asinkron; tidak pernah memblokir pemanggil.
+        Jika ada 'files', json_data dikirim sebagai field form multipart.
+        """
+        if self.outbox is not None:
+            self.outbox.append(service_name, url, json_data, files)
+            self._outbox_wakeup.set()
+            return
+        self._begin()
+        self._executor.submit(self._attempt, _Request(url, service_name, json_data, files))
+
+    def log_event(self, event: dict):
+        """Menambahkan event ke batch log server; batch dikirim saat penuh atau saat flush interval habis."""
+        if self.outbox is not None:
+            # Batching dilakukan oleh pengirim outbox saat mengambil notifikasi yang jatuh tempo.
+            self.send(self.api_cfg['log_server']['endpoint'], LOG_SERVICE, json_data=event)
+            return
+        with self._batch_lock:
+            self._batch.append(event)
+            first_in_batch = len(self._batch) == 1
+            full = len(self._batch) >= self.batch_size
+        if full:
+            self.flush()
+        elif first_in_batch:
+            self._scheduler.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """Mengirim semua event log server yang tertunda."""
+        with self._batch_lock:
+            events, self._batch = self._batch, []
+        if not events:
+            return
+        payload = events[0] if self.batch_size == 1 else {"events": events}
+        self.send(self.api_cfg['log_server']['endpoint'], LOG_SERVICE, json_data=payload)
+
+    def stats(self) -> dict:
+        """Mengembalikan statistik per layanan: jumlah sukses, gagal, retry, dan latensi rata-rata."""
+        with self._stats_lock:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    def update_config(self, api_cfg: dict):
+        """
+        Menerapkan pengaturan 'api' (juga saat hot-reload config): endpoint, API key, timeout, retry, dan batching.
+        Ukuran connection pool dan outbox hanya dibaca saat startup.
+        """
+        # Semua nilai dibaca dulu agar config yang salah tidak menerapkan sebagian pengaturan.
+        http_cfg = api_cfg.get('http', {})
+        log_cfg = api_cfg.get('log_server', {})
+        settings = {
+            "timeout": http_cfg.get('timeout_sec', 10),
+            "retries": http_cfg.get('retries', 3),
+            "backoff_base": http_cfg.get('backoff_base_sec', 1.0),
+            "max_backoff": http_cfg.get('max_backoff_sec', 300),
+            "batch_size": max(1, int(log_cfg.get('batch_size', 1))),
+            "flush_interval": log_cfg.get('flush_interval_sec', 2.0),
+        }
+        authorization = f"Bearer {api_cfg['api_key']}"
+
+        self.api_cfg = api_cfg
+        for name, value in settings.items():
+            setattr(self, name, value)
+        if self._session is not None:
+            self._session.headers["Authorization"] = authorization
+
+    def close(self, timeout: float = 15.0):
+        """Mengirim sisa batch lalu menunggu request yang masih berjalan (maksimal 'timeout' detik)."""
+        if self.outbox is not None:
+            # Notifikasi yang belum terkirim tetap tersimpan di outbox dan dikirim saat program berjalan lagi.
+            self._outbox_stop.set()
+            self._outbox_wakeup.set()
+            self._outbox_thread.join(timeout)
+            pending = self.outbox.stats()['pending']
+            if pending:
+                self.logger.info(f"📮 {pending} notifikasi masih di outbox dan akan dikirim saat sistem berjalan lagi.")
+            self.outbox.close()
+        self.flush()
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._in_flight > 0 and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+            if self._in_flight > 0:
+                self.logger.warning(f"⚠️ {self._in_flight} notifikasi belum terkirim saat sistem berhenti.")
+        self._scheduler.stop()
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+    # --- Internal ---
+
+    @property
+    def session(self):
+        """requests.Session bersama dengan connection pool keep-alive, dibuat saat pertama dipakai."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers["Authorization"] = f"Bearer {self.api_cfg['api_key']}"
+                    self._session = session
+        return self._session
+
+    def _begin(self):
+        with self._idle:
+            self._in_flight += 1
+
+    def _finish(self):
+        with self._idle:
+            self._in_flight -= 1
+            self._idle.notify_all()
+
+    def _record(self, service_name: str, key: str, latency: float = None):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                service_name, {"success": 0, "failure": 0, "retries": 0, "latency_total": 0.0, "latency_count": 0}
+            )
+            stats[key] += 1
+            if latency is not None:
+                stats["latency_total"] += latency
+                stats["latency_count"] += 1
+
+    def _attempt(self, request: _Request):
+        """Satu percobaan pengiriman; jika gagal, percobaan berikutnya dijadwalkan tanpa sleep."""
+        import requests
+
+        request.attempt += 1
+        started = time.monotonic()
+        try:
+            if request.files:
+                response = self.session.post(request.url, data=request.json_data, files=request.files, timeout=self.timeout)
+            else:
+                response = self.session.post(request.url, json=request.json_data, timeout=self.timeout)
+            response.raise_for_status()
+            latency = time.monotonic() - started
+            self._record(request.service_name, "success", latency)
+            self.logger.info(
+                f"✔️ Notifikasi {request.service_name} berhasil dikirim. Status: {response.status_code} ({latency * 1000:.0f} ms)",
+                extra={"event": "api_success", "service": request.service_name, "status": response.status_code,
+                       "latency_ms": round(latency * 1000)},
+            )
+            self._finish()
+        except requests.RequestException as e:
+            latency = time.monotonic() - started
+            self.logger.warning(f"Gagal mengirim notifikasi {request.service_name} (Percobaan {request.attempt}/{self.retries}): {e}")
+            if _is_permanent(e):
+                self._record(request.service_name, "failure", latency)
+                self.logger.error(
+                    f"❌ Notifikasi {request.service_name} ditolak server (status {e.response.status_code}); tidak dicoba ulang.",
+                    extra={"event": "api_rejected", "service": request.service_name, "status": e.response.status_code},
+                )
+                self._finish()
+            elif request.attempt < self.retries:
+                self._record(request.service_name, "retries", latency)
+                delay = self.backoff_base * 2 ** (request.attempt - 1)
+                self._scheduler.call_later(delay, lambda: self._executor.submit(self._attempt, request))
+            else:
+                self._record(request.service_name, "failure", latency)
+                self.logger.error(
+                    f"❌ Gagal total mengirim notifikasi {request.service_name} setelah {self.retries} percobaan.",
+                    extra={"event": "api_failure", "service": request.service_name, "attempts": request.attempt},
+                )
+                self._finish()
+        except Exception as e:
+            self._record(request.service_name, "failure")
+            self.logger.error(f"Error tak terduga saat mengirim notifikasi {request.service_name}: {e}", exc_info=True)
+            self._finish()
+
+    # --- Pengirim outbox ---
+
+    def _reject(self, items: list, status: int, latency: float):
+        """Menangani penolakan permanen: batch dipecah per event, event tunggal dihapus dari outbox."""
+        first = items[0]
+        if len(items) > 1:
+            self.logger.warning(f"Batch {len(items)} event {first.service} ditolak server (status {status}); "
+                                f"event dikirim ulang satu per satu.",
+                                extra={"event": "api_rejected", "service": first.service, "status": status,
+                                       "events": len(items)})
+            for item in items:
+                self._deliver([item])
+            return
+        self.outbox.reject(items)
+        self._record(first.service, "failure", latency)
+        self.logger.error(f"❌ Notifikasi {first.service} ditolak server (status {status}) dan dihapus dari outbox "
+                          f"(idempotency key {first.key}).",
+                          extra={"event": "api_rejected", "service": first.service, "status": status,
+                                 "idempotency_key": first.key})
+
+    def _run_outbox(self):
+        """Mengambil notifikasi yang jatuh tempo dari outbox lalu mengirimnya secara bulk."""
+        while not self._outbox_stop.is_set():
+            items = self.outbox.due(time.time(), limit=max(self.batch_size, 1) * 5)
+            if not items:
+                next_due = self.outbox.next_due_in(time.time())
+                self._outbox_wakeup.wait(5.0 if next_due is None else min(next_due, 5.0))
+                self._outbox_wakeup.clear()
+                continue
+
+            # Event log server digabung per batch_size; notifikasi lain (WhatsApp) dikirim satu per satu.
+            log_items = [item for item in items if item.service == LOG_SERVICE and not item.files]
+            other_items = [item for item in items if item.service != LOG_SERVICE or item.files]
+            groups = [log_items[i:i + self.batch_size] for i in range(0, len(log_items), self.batch_size)]
+            groups += [[item] for item in other_items]
+            wait([self._executor.submit(self._deliver, group) for group in groups])
+
+    def _deliver(self, items: list):
+        """Mengirim satu request dari outbox; sukses = hapus dari outbox, gagal = jadwalkan ulang dengan backoff."""
+        import requests
+
+        first = items[0]
+        started = time.monotonic()
+        try:
+            if len(items) > 1 or (first.service == LOG_SERVICE and self.batch_size > 1):
+                events = [{**item.payload, "idempotency_key": item.key} for item in items]
+                key = hashlib.sha1("".join(item.key for item in items).encode()).hexdigest()
+                response = self.session.post(first.url, json={"events": events}, headers={"Idempotency-Key": key},
+                                             timeout=self.timeout)
+            elif first.files:
+                response = self.session.post(first.url, data=first.payload, files=first.files,
+                                             headers={"Idempotency-Key": first.key}, timeout=self.timeout)
+            else:
+                response = self.session.post(first.url, json=first.payload, headers={"Idempotency-Key": first.key},
+                                             timeout=self.timeout)
+            response.raise_for_status()
+            latency = time.monotonic() - started
+            self.outbox.delete(items)
+            self._record(first.service, "success", latency)
+            self.logger.info(f"✔️ Notifikasi {first.service} berhasil dikirim dari outbox ({len(items)} event). "
+                             f"Status: {response.status_code} ({latency * 1000:.0f} ms)",
+                             extra={"event": "api_success", "service": first.service, "status": response.status_code,
+                                    "latency_ms": round(latency * 1000), "events": len(items)})
+        except requests.RequestException as e:
+            if _is_permanent(e):
+                self._reject(items, e.response.status_code, time.monotonic() - started)
+                return
+            attempts = max(item.attempts for item in items) + 1
+            delay = min(self.backoff_base * 2 ** (attempts - 1), self.max_backoff)
+            self.outbox.reschedule(items, time.time() + delay)
+            self._record(first.service, "retries", time.monotonic() - started)
+            self.logger.warning(f"Gagal mengirim notifikasi {first.service} dari outbox (percobaan {attempts}), "
+                                f"dicoba lagi dalam {delay:g} detik: {e}",
+                                extra={"event": "api_retry", "service": first.service, "attempts": attempts,
+                                       "retry_in_sec": delay})
+        except Exception as e:
+            self.outbox.reschedule(items, time.time() + self.max_backoff)
+            self._record(first.service, "failure")
+            self.logger.error(f"Error tak terduga saat mengirim notifikasi {first.service} dari outbox: {e}", exc_info=True)
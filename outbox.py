@@ -0,0 +1,175 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Outbox Notifikasi Tahan Restart (Outbox)
+
+# Saat API WhatsApp/log server mati, notifikasi tidak lagi dibuang setelah beberapa percobaan.
+# Setiap notifikasi ditulis dulu ke database SQLite (mode WAL, sinkronisasi NORMAL) sehingga append murah,
+# lalu dikirim oleh pengirim latar belakang di Notifier. Baris baru dihapus setelah API membalas sukses;
+# jika gagal, jadwal percobaan berikutnya diundur secara eksponensial dan disimpan di database,
+# sehingga pengiriman berlanjut setelah program di-restart.
+# Setiap baris memiliki idempotency key tetap (dikirim sebagai header 'Idempotency-Key' dan field event)
+# agar server dapat membuang duplikat jika respons sukses sempat hilang.
+# Ukuran outbox dibatasi (max_rows, max_mb); jika terlampaui, notifikasi tertua dibuang dan dihitung.
+# Notifikasi yang ditolak permanen oleh server (HTTP 4xx selain 408/429) dihapus tanpa dicoba ulang dan dihitung
+# sebagai 'rejected'.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    service TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT,
+    attachment_field TEXT,
+    attachment_name TEXT,
+    attachment_type TEXT,
+    attachment BLOB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at);
+"""
+
+
+class OutboxItem:
+    """Satu notifikasi yang menunggu dikirim."""
+
+    __slots__ = ("id", "key", "service", "url", "payload", "files", "attempts", "size")
+
+    def __init__(self, row: tuple):
+        self.id, self.key, self.service, self.url, payload, field, name, mime, blob, self.attempts = row
+        self.payload = json.loads(payload) if payload is not None else None
+        self.files = {field: (name, blob, mime)} if blob is not None else None
+        self.size = len(payload or "") + len(blob or b"")
+
+
+class Outbox:
+    """Antrian notifikasi persisten di SQLite dengan batas ukuran."""
+
+    def __init__(self, path: str, logger: logging.Logger, max_rows: int = 10000, max_mb: float = 500.0):
+        self.logger = logger
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # Jumlah baris dan ukuran data disimpan di memori agar batas ukuran tidak perlu query COUNT setiap append.
+        self._rows, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) + COALESCE(SUM(LENGTH(attachment)), 0) FROM outbox"
+        ).fetchone()
+        self.dropped = 0
+        self.delivered = 0
+        self.rejected = 0
+        if self._rows:
+            logger.info(f"📮 Outbox berisi {self._rows} notifikasi tertunda dari sesi sebelumnya; pengiriman dilanjutkan.")
+
+    def append(self, service: str, url: str, json_data: dict = None, files: dict = None) -> str:
+        """Menyimpan notifikasi baru (siap dikirim segera). Mengembalikan idempotency key-nya."""
+        key = uuid.uuid4().hex
+        payload = json.dumps(json_data) if json_data is not None else None
+        field = name = mime = blob = None
+        if files:
+            # Notifier hanya mengirim satu lampiran per request: {field: (nama file, bytes, mime)}.
+            field, (name, blob, mime) = next(iter(files.items()))
+        size = len(payload or "") + len(blob or b"")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (idempotency_key, service, url, payload, attachment_field, attachment_name, "
+                "attachment_type, attachment, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, service, url, payload, field, name, mime, blob, now, now),
+            )
+            self._rows += 1
+            self._bytes += size
+            self._enforce_limits()
+        return key
+
+    def due(self, now: float, limit: int = 100) -> list:
+        """Mengambil notifikasi yang sudah waktunya dikirim, urut dari yang tertua."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, service, url, payload, attachment_field, attachment_name, "
+                "attachment_type, attachment, attempts FROM outbox WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+        return [OutboxItem(row) for row in rows]
+
+    def next_due_in(self, now: float) -> float:
+        """Detik sampai notifikasi berikutnya jatuh tempo (None jika outbox kosong)."""
+        with self._lock:
+            (next_at,) = self._conn.execute("SELECT MIN(next_attempt_at) FROM outbox").fetchone()
+        return None if next_at is None else max(0.0, next_at - now)
+
+    def delete(self, items: list):
+        """Menghapus notifikasi yang sudah berhasil dikirim."""
+        with self._lock:
+            deleted = self._delete_ids([item.id for item in items])
+            self._bytes -= sum(item.size for item in items if item.id in deleted)
+            self.delivered += len(deleted)
+
+    def reject(self, items: list):
+        """Menghapus notifikasi yang ditolak permanen oleh server (tidak akan dicoba ulang)."""
+        with self._lock:
+            deleted = self._delete_ids([item.id for item in items])
+            self._bytes -= sum(item.size for item in items if item.id in deleted)
+            self.rejected += len(deleted)
+
+    def reschedule(self, items: list, next_attempt_at: float):
+        """Menambah jumlah percobaan dan menjadwalkan ulang notifikasi yang gagal dikirim."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                [(next_attempt_at, item.id) for item in items],
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._rows, "bytes": self._bytes, "dropped": self.dropped, "delivered": self.delivered,
+                    "rejected": self.rejected}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _delete_ids(self, ids: list) -> set:
+        """Menghapus baris berdasarkan id (pemanggil memegang lock); mengembalikan id yang benar-benar terhapus."""
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        existing = {row[0] for row in self._conn.execute(f"SELECT id FROM outbox WHERE id IN ({placeholders})", ids)}
+        self._conn.execute(f"DELETE FROM outbox WHERE id IN ({placeholders})", ids)
+        self._rows -= len(existing)
+        return existing
+
+    def _enforce_limits(self):
+        """Membuang notifikasi tertua jika jumlah baris atau ukuran outbox melebihi batas (pemanggil memegang lock)."""
+        if self._rows <= self.max_rows and self._bytes <= self.max_bytes:
+            return
+        excess_rows = max(0, self._rows - self.max_rows)
+        evict, freed = [], 0
+        cursor = self._conn.execute(
+            "SELECT id, COALESCE(LENGTH(payload), 0) + COALESCE(LENGTH(attachment), 0) FROM outbox ORDER BY id"
+        )
+        for row_id, size in cursor:
+            if len(evict) >= excess_rows and self._bytes - freed <= self.max_bytes:
+                break
+            evict.append(row_id)
+            freed += size
+        cursor.close()
+        self._delete_ids(evict)
+        self._bytes -= freed
+        self.dropped += len(evict)
+        self.logger.warning(f"⚠️ Outbox penuh. {len(evict)} notifikasi tertua dibuang (total dibuang: {self.dropped}).")
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+# Server Preview MJPEG (MjpegPreviewServer)
+
+# Endpoint HTTP kecil untuk melihat frame beranotasi dari server tanpa layar (mode headless).
+# Loop deteksi hanya menyalin dan menggambar frame jika ada klien yang sedang menonton kamera tersebut.
+# Encoding JPEG dilakukan di thread klien (bukan di loop deteksi), hanya saat ada klien,
+# dan dengan frame rate yang dipilih klien lewat parameter '?fps='.
+# Hasil encoding dipakai bersama oleh semua klien yang menonton frame yang sama.
+
+BOUNDARY = "frame"
+
+
+class _CameraChannel:
+    """Frame terbaru dan jumlah penonton untuk satu kamera."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.viewers = 0
+        self.encode_lock = threading.Lock()
+        self.encoded_seq = -1
+        self.encoded = None
+
+
+class MjpegPreviewServer:
+    """Server HTTP yang men-stream frame beranotasi setiap kamera sebagai MJPEG."""
+
+    def __init__(self, camera_names: list, logger: logging.Logger, host: str = "127.0.0.1", port: int = 8080,
+                 jpeg_quality: int = 70, default_fps: float = 5.0, max_fps: float = 15.0):
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.jpeg_quality = jpeg_quality
+        self.default_fps = default_fps
+        self.max_fps = max_fps
+        self._channels = {name: _CameraChannel() for name in camera_names}
+        self._stop_event = threading.Event()
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        """Menjalankan server HTTP di thread daemon."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                server.logger.debug(f"Preview {self.address_string()} - {format % args}")
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mjpeg-preview", daemon=True)
+        self._thread.start()
+        self.logger.info(f"🌐 Preview MJPEG aktif di http://{self.host}:{self.port}/")
+
+    def stop(self):
+        """Menghentikan server dan memutus semua klien."""
+        self._stop_event.set()
+        for channel in self._channels.values():
+            with channel.cond:
+                channel.cond.notify_all()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def has_viewers(self, camera_name: str) -> bool:
+        """True jika ada klien yang sedang menonton kamera ini."""
+        channel = self._channels.get(camera_name)
+        return channel is not None and channel.viewers > 0
+
+    def publish(self, camera_name: str, frame: np.ndarray):
+        """Menyimpan frame beranotasi terbaru. Frame tidak disalin; pemanggil tidak boleh mengubahnya lagi."""
+        channel = self._channels.get(camera_name)
+        if channel is None:
+            return
+        with channel.cond:
+            channel.frame = frame
+            channel.seq += 1
+            channel.cond.notify_all()
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        """Merutekan request: '/' daftar kamera, '/stream/<nama>?fps=N' stream MJPEG."""
+        url = urlparse(request.path)
+        if url.path in ("/", "/index.html"):
+            links = "".join(f'<li><a href="/stream/{name}">{name}</a></li>' for name in self._channels)
+            body = f"<html><body><h3>Preview Kamera</h3><ul>{links}</ul></body></html>".encode()
+            request.send_response(200)
+            request.send_header("Content-Type", "text/html; charset=utf-8")
+            request.send_header("Content-Length", str(len(body)))
+            request.end_headers()
+            request.wfile.write(body)
+            return
+
+        name = url.path[len("/stream/"):] if url.path.startswith("/stream/") else None
+        if name not in self._channels:
+            request.send_error(404, "Kamera tidak ditemukan")
+            return
+
+        try:
+            fps = float(parse_qs(url.query).get("fps", [self.default_fps])[0])
+        except ValueError:
+            fps = self.default_fps
+        fps = min(max(fps, 0.1), self.max_fps)
+        self._stream(request, name, fps)
+
+    def _stream(self, request: BaseHTTPRequestHandler, name: str, fps: float):
+        """Mengirim frame MJPEG ke satu klien sampai koneksi terputus."""
+        channel = self._channels[name]
+        request.send_response(200)
+        request.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        request.send_header("Cache-Control", "no-cache")
+        request.end_headers()
+
+        with channel.cond:
+            channel.viewers += 1
+        self.logger.info(f"👀 Klien preview terhubung ke kamera {name} ({fps:g} FPS). Penonton: {channel.viewers}")
+
+        interval = 1.0 / fps
+        last_seq = -1
+        try:
+            while not self._stop_event.is_set():
+                started = time.monotonic()
+                with channel.cond:
+                    if channel.seq == last_seq:
+                        channel.cond.wait(1.0)
+                    if channel.seq == last_seq or channel.frame is None:
+                        continue
+                    frame, last_seq = channel.frame, channel.seq
+                # Encode di luar lock agar publish() dari loop deteksi tidak ikut menunggu.
+                jpeg = self._encode(channel, frame, last_seq)
+
+                request.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                request.wfile.write(jpeg)
+                request.wfile.write(b"\r\n")
+
+                remaining = interval - (time.monotonic() - started)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with channel.cond:
+                channel.viewers -= 1
+            self.logger.info(f"Klien preview kamera {name} terputus. Penonton: {channel.viewers}")
+
+    def _encode(self, channel: _CameraChannel, frame: np.ndarray, seq: int) -> bytes:
+        """Encode frame ke JPEG sekali saja per nomor urut frame, dipakai bersama oleh semua klien."""
+        with channel.encode_lock:
+            if channel.encoded_seq != seq:
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                if ok:
+                    channel.encoded = buffer.tobytes()
+                    channel.encoded_seq = seq
+            return channel.encoded
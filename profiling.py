@@ -0,0 +1,70 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Pengukuran Durasi Tahap Pipeline (StageTimer)
+
+# RealTimeDetector membungkus setiap tahap pipeline dengan stage_timer.measure("<tahap>")
+# atau melaporkan durasi langsung dengan stage_timer.record("<tahap>", detik).
+# Nilai lain dengan label (misalnya umur frame per kamera) dilaporkan dengan stage_timer.observe(nama, nilai, **label).
+# Secara default dipakai NullStageTimer (tanpa biaya berarti); benchmark memasang StageTimer
+# yang menyimpan semua sampel untuk menghitung p50/p95/p99 per tahap, sedangkan endpoint metrik memasang
+# MetricsRegistry (metrics.py) dengan antarmuka yang sama.
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullStageTimer:
+    """Stage timer yang tidak mencatat apa pun (default di produksi)."""
+
+    def measure(self, stage: str):
+        return _NULL_CONTEXT
+
+    def record(self, stage: str, seconds: float):
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+
+class StageTimer:
+    """Mencatat semua sampel durasi per tahap untuk ringkasan persentil."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def observe(self, name: str, value: float, **labels):
+        # Label diabaikan; sampel dari semua kamera digabung dalam satu ringkasan.
+        self.record(name, value)
+
+    def summary(self) -> dict:
+        """Mengembalikan jumlah sampel, rata-rata, dan p50/p95/p99 (ms) untuk setiap tahap."""
+        with self._lock:
+            samples = {stage: np.array(values) * 1000 for stage, values in self._samples.items()}
+        summary = {}
+        for stage, values in samples.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[stage] = {
+                "count": int(values.size),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return summary
@@ -0,0 +1,164 @@
+import cv2
+import numpy as np
+
+# Inferensi Jarang dengan Propagasi Track (TrackPropagator)
+
+# Inferensi YOLO adalah biaya CPU terbesar, padahal orang bergerak lambat dibandingkan 25 fps.
+# Dalam mode ini detektor + ByteTrack hanya dijalankan setiap N frame ('fixed') atau dengan interval yang
+# menyesuaikan kecepatan gerak dan jumlah track ('adaptive'). Di antara dua deteksi, box setiap track_id
+# digeser dengan sparse optical flow (Lucas-Kanade) pada frame grayscale yang diperkecil:
+# titik fitur di dalam box dilacak, lalu box digeser sebesar median perpindahan titiknya.
+# Jika titik sebuah track hilang, box digeser dengan kecepatan terakhirnya dan deteksi dipaksa pada frame berikutnya.
+# Box hasil propagasi memakai format yang sama (x1, y1, x2, y2, track_id, conf, cls) sehingga
+# tracked_persons, ROI, dan trigger persistence di _process_detections tetap berjalan seperti biasa.
+
+SPARSE_MODES = ("fixed", "adaptive")
+
+_LK_PARAMS = dict(winSize=(15, 15), maxLevel=2, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+class TrackPropagator:
+    """Menentukan frame mana yang perlu dideteksi dan menggeser box track di antara deteksi."""
+
+    def __init__(self, mode: str = "fixed", interval: int = 3, min_interval: int = 1, max_interval: int = 6,
+                 crowd_tracks: int = 5, max_drift: float = 0.3, flow_width: int = 320, points_per_track: int = 8):
+        self.mode = mode if mode in SPARSE_MODES else "fixed"
+        self.interval = max(1, int(interval))
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.crowd_tracks = crowd_tracks
+        self.max_drift = max_drift
+        self.flow_width = flow_width
+        self.points_per_track = points_per_track
+
+        self._tracks = None        # track terakhir (koordinat frame penuh)
+        self._prev_gray = None
+        self._scale = 1.0
+        self._points = None        # titik fitur (P x 1 x 2, koordinat frame kecil)
+        self._owners = None        # indeks track pemilik setiap titik
+        self._velocity = None      # perpindahan per frame setiap track (koordinat frame penuh)
+        self._since_detection = 0
+        self._force_detection = True
+        self._speed = 0.0          # perpindahan per frame terbesar relatif terhadap tinggi box
+
+        # Statistik
+        self.frames_propagated = 0
+        self.tracks_lost = 0
+
+    def current_interval(self) -> int:
+        """Interval deteksi (dalam frame) yang berlaku saat ini."""
+        if self.mode == "fixed":
+            return self.interval
+        if self._tracks is None or len(self._tracks) == 0:
+            # Tidak ada yang perlu dipropagasi; orang baru cukup dicari dengan interval terpanjang.
+            return self.max_interval
+        if len(self._tracks) >= self.crowd_tracks:
+            return self.min_interval
+        # Box boleh bergeser paling jauh max_drift x tinggi box sebelum dikoreksi detektor.
+        interval = int(self.max_drift / self._speed) if self._speed > 0 else self.max_interval
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def should_detect(self) -> bool:
+        """True jika frame berikutnya harus melalui detektor (bukan propagasi)."""
+        return self._force_detection or self._since_detection + 1 >= self.current_interval()
+
+    def reset(self, frame: np.ndarray, tracks: np.ndarray):
+        """Menyimpan hasil deteksi + tracking terbaru sebagai titik awal propagasi."""
+        gray = self._to_gray(frame)
+        self._since_detection = 0
+        self._force_detection = False
+        if self._tracks is not None and len(self._tracks) and len(tracks):
+            # Kecepatan track dipertahankan antar deteksi (dipakai jika flow gagal).
+            self._velocity = self._match_velocity(tracks)
+        else:
+            self._velocity = np.zeros((len(tracks), 2), dtype=np.float32)
+        self._tracks = tracks.copy()
+        self._prev_gray = gray
+        self._select_points(gray)
+
+    def propagate(self, frame: np.ndarray) -> np.ndarray:
+        """Menggeser box track terakhir ke frame ini dengan optical flow; mengembalikan array track (N x 7)."""
+        self._since_detection += 1
+        self.frames_propagated += 1
+        if self._tracks is None or len(self._tracks) == 0:
+            return self._tracks if self._tracks is not None else np.zeros((0, 7), dtype=np.float32)
+
+        gray = self._to_gray(frame)
+        if self._prev_gray is None or gray.shape != self._prev_gray.shape:
+            # Resolusi berubah: titik lama tidak berlaku lagi.
+            self._force_detection = True
+            self._prev_gray = gray
+            return self._tracks
+
+        shifts = self._velocity.copy()
+        lost = np.ones(len(self._tracks), dtype=bool)
+        if self._points is not None and len(self._points):
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None, **_LK_PARAMS)
+            good = status.ravel() == 1
+            moved = (new_points - self._points).reshape(-1, 2) / self._scale
+            for index in range(len(self._tracks)):
+                mask = good & (self._owners == index)
+                if np.count_nonzero(mask) >= 2:
+                    shifts[index] = np.median(moved[mask], axis=0)
+                    lost[index] = False
+            self._points = new_points[good]
+            self._owners = self._owners[good]
+
+        if lost.any():
+            self.tracks_lost += int(lost.sum())
+            self._force_detection = True
+
+        tracks = self._tracks.copy()
+        tracks[:, [0, 2]] += shifts[:, 0:1]
+        tracks[:, [1, 3]] += shifts[:, 1:2]
+        height, width = frame.shape[:2]
+        tracks[:, [0, 2]] = np.clip(tracks[:, [0, 2]], 0, width - 1)
+        tracks[:, [1, 3]] = np.clip(tracks[:, [1, 3]], 0, height - 1)
+
+        box_heights = np.maximum(self._tracks[:, 3] - self._tracks[:, 1], 1.0)
+        self._speed = float(np.max(np.hypot(shifts[:, 0], shifts[:, 1]) / box_heights))
+        self._velocity = shifts
+        self._tracks = tracks
+        self._prev_gray = gray
+        return tracks
+
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        small_w = min(self.flow_width, width)
+        self._scale = small_w / width
+        if small_w != width:
+            frame = cv2.resize(frame, (small_w, max(1, int(height * self._scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _select_points(self, gray: np.ndarray):
+        """Memilih titik fitur di dalam setiap box (koordinat frame kecil)."""
+        points, owners = [], []
+        height, width = gray.shape
+        for index, (x1, y1, x2, y2) in enumerate(self._tracks[:, :4] * self._scale):
+            x1, y1 = max(int(x1), 0), max(int(y1), 0)
+            x2, y2 = min(int(x2), width), min(int(y2), height)
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+            corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], self.points_per_track, 0.01, 3)
+            if corners is None:
+                continue
+            corners[:, 0, 0] += x1
+            corners[:, 0, 1] += y1
+            points.append(corners)
+            owners += [index] * len(corners)
+        if points:
+            self._points = np.concatenate(points).astype(np.float32)
+            self._owners = np.array(owners)
+        else:
+            self._points = None
+            self._owners = None
+
+    def _match_velocity(self, tracks: np.ndarray) -> np.ndarray:
+        """Kecepatan terakhir (hasil flow) dari track_id yang sama dibawa ke hasil deteksi baru."""
+        velocity = np.zeros((len(tracks), 2), dtype=np.float32)
+        previous = {int(track_id): row for row, track_id in enumerate(self._tracks[:, 4])}
+        for index, track in enumerate(tracks):
+            row = previous.get(int(track[4]))
+            if row is not None:
+                velocity[index] = self._velocity[row]
+        return velocity
@@ -1,19 +1,36 @@
+import atexit
 import cv2
 import yaml
 import logging
 import os
+import queue
+import signal
 import time
-from datetime import datetime
+from logging.handlers import QueueListener
 from pathlib import Path
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from collections import defaultdict
 import numpy as np
-import requests
-from ultralytics import YOLO
+
+from camera import CameraContext
+from config_reload import MODEL_LOAD_KEYS, RESTART_SECTIONS, ROI_KEYS, ConfigWatcher
+from inference_pool import InferencePool
+from load_shedding import SHED_STEPS, LoadShedder
+from log_handlers import ROTATION_MODES, JsonlFormatter, RateLimitFilter, StructuredQueueHandler, build_file_handler
+from media import encode_jpeg, write_atomic
+from metrics import MetricsRegistry, MetricsServer
+from model_backend import load_detection_model
+from notification_queue import DetectionEvent, EventQueue
+from notifier import Notifier
+from profiling import NullStageTimer
+from preview import MjpegPreviewServer
+from tracking import EMPTY_TRACKS
 # Import dan Setup
 
 # Mengimpor berbagai library untuk video, logging, file, waktu, threading, numpy, requests, dan YOLO dari ultralytics.
 # Fungsi setup_logger membuat logger yang menulis ke file dan menampilkan ke konsol.
+# Penulisan log berjalan di thread QueueListener (logger hanya memasukkan record ke antrian), file log teks dan
+# stream JSONL dirotasi dan dikompresi (log_handlers.py), dan pesan berulang per kamera dibatasi lajunya.
 # Kelas RealTimeDetector
 
 # Kelas utama untuk deteksi objek real-time dari stream RTSP, dengan pemrosesan asinkron untuk I/O (menyimpan file, kirim API).
@@ -21,41 +38,58 @@ from ultralytics import YOLO
 
 # Memuat konfigurasi dari file YAML (config.yaml).
 # Inisialisasi logger, model YOLO, dan device (CPU/GPU).
-# Konfigurasi ROI (Region of Interest) jika diaktifkan.
-# State management untuk tracking orang (waktu pertama dan terakhir terlihat, status notifikasi).
-# Membuat ThreadPoolExecutor untuk tugas asinkron (max 5 thread).
+# Backend model (torch/onnxruntime/openvino), imgsz, thread, INT8, dan warm-up diatur oleh model_backend.py.
+# Model dimuat di thread latar belakang (ultralytics/torch baru diimpor di sana) bersamaan dengan pembukaan stream;
+# run() menunggu model siap sebelum loop deteksi dan mencatat waktu sampai deteksi pertama.
+# Membuat satu CameraContext (camera.py) untuk setiap kamera di daftar 'cameras'.
+# Setiap kamera memiliki ROI, tracker ByteTrack, dan state tracking orang sendiri; model YOLO dibagi bersama.
+# Membuat antrian notifikasi terbatas (notification_queue.py) dan worker thread untuk tugas asinkron.
 # Menyimpan threshold confidence, target class, dan durasi persistence dari config.
 # Proses Deteksi (_process_detections)
 
-# Untuk setiap box hasil deteksi:
-# Dicek apakah confidence cukup dan kelas sesuai target (misal: person).
-# Dicek apakah ada track_id.
-# Dicek apakah berada di dalam ROI (jika diaktifkan).
+# Menerima array track (x1, y1, x2, y2, track_id, conf, cls) hasil tracker per kamera.
+# Filter confidence, kelas target (misal: person), dan ROI dilakukan sekaligus dengan mask array;
+# ROI dicek dengan melihat nilai ROI mask di titik tengah setiap box.
+# Untuk setiap box yang lolos filter:
 # Gambar kotak dan label pada frame.
-# Update waktu pertama dan terakhir terlihat untuk track_id.
-# Jika orang sudah terlihat lebih lama dari threshold dan belum pernah dinotifikasi, submit tugas asinkron untuk menyimpan gambar dan kirim notifikasi.
+# Update waktu pertama dan terakhir terlihat untuk track_id di TrackStore (track_store.py).
+# Track yang tidak terlihat melebihi disappearance_timeout_sec dihapus setiap frame.
+# Jika orang sudah terlihat lebih lama dari threshold dan belum pernah dinotifikasi, masukkan event ke antrian notifikasi
+# (hanya berisi gambar yang dibutuhkan sink aktif); jika antrian penuh, diterapkan kebijakan overflow.
 # Tugas Asinkron (_handle_persistent_detection)
 
-# Menyimpan gambar (full/crop sesuai config) ke folder berdasarkan tanggal.
-# Jika fitur WhatsApp aktif, mengirim notifikasi dengan gambar ke API WhatsApp.
-# Jika fitur log server aktif, mengirim log ke server ZAI.
+# Meng-encode gambar (full/crop sesuai config) ke JPEG di memori sekali saja (media.py),
+# lalu menyimpannya secara atomik ke folder berdasarkan tanggal.
+# Jika fitur WhatsApp aktif, mengirim notifikasi dengan buffer JPEG yang sama ke API WhatsApp.
+# Jika fitur log server aktif, menambahkan log ke batch untuk server ZAI.
 # Semua proses ini dilakukan di thread terpisah agar tidak menghambat deteksi utama.
-# Kirim API (_send_api_request)
+# Kirim API (Notifier, notifier.py)
 
-# Mengirim request ke API dengan mekanisme retry (maksimal 3 kali).
+# Semua request memakai satu requests.Session dengan connection pool keep-alive.
+# Retry (maksimal 3 kali) dijadwalkan oleh timer, bukan time.sleep di worker thread.
+# Event log server dikirim per batch (saat batch penuh atau flush interval habis).
 # Mendukung pengiriman file (gambar) dan data JSON.
 # Loop Utama (run)
 
-# Membuka stream RTSP (atau webcam jika belum diatur).
-# Membuat ROI mask jika diaktifkan.
-# Loop membaca frame:
-# Jika gagal, mencoba reconnect.
-# Proses frame (mask ROI jika ada).
-# Deteksi dengan YOLO dan proses hasilnya.
+# Membuka semua stream kamera (RTSP/webcam); ROI mask dibuat dari frame pertama setiap kamera
+# dan dibuat ulang jika resolusi stream berubah.
+# Frame dibaca oleh FrameGrabber (capture.py) di thread terpisah; hanya frame terbaru yang diproses.
+# Jika stream gagal, reconnect ditangani oleh FrameGrabber tanpa menghambat loop deteksi.
+# Loop mengumpulkan frame terbaru dari semua kamera:
+# Motion gate (opsional) melewati inferensi untuk frame tanpa perubahan di ROI, dengan inferensi keep-alive berkala.
+# Inferensi jarang (opsional) hanya mendeteksi setiap N frame; di antaranya box track digeser dengan optical flow.
+# Hot-reload config (opsional, config_reload.py): perubahan config.yaml (atau sinyal SIGHUP) divalidasi lalu
+# diterapkan di antara dua batch frame: ROI, threshold, penyimpanan, dan API. Perubahan model/device memuat
+# model baru di thread latar belakang tanpa menghentikan stream.
+# Pengendali beban (opsional, load_shedding.py) menurunkan imgsz, melewati frame, mematikan framerecord, dan
+# menurunkan kualitas JPEG secara bertahap jika latensi frame melebihi target, lalu memulihkannya saat beban turun.
+# Proses frame sesuai mode ROI: 'crop' (potong ke kotak pembatas ROI) atau 'mask' (hitamkan area luar ROI).
+# Deteksi dengan YOLO dalam satu batch untuk semua kamera, lalu tracking per kamera
+# (box dari mode 'crop' dipetakan kembali ke koordinat frame penuh).
 # Gambar ROI di frame jika diaktifkan.
-# Tampilkan frame ke window.
+# Tampilkan frame setiap kamera ke window masing-masing dan catat FPS per kamera.
 # Keluar jika tombol 'q' ditekan.
-# Setelah selesai, release semua resource dan shutdown thread executor.
+# Setelah selesai, release semua resource, tutup antrian notifikasi, dan tunggu worker selesai.
 # Main Program
 
 # Membuat instance RealTimeDetector dan menjalankan deteksi.
@@ -63,8 +97,29 @@ from ultralytics import YOLO
 # Kesimpulan:
 # Kode ini mendeteksi orang secara real-time dari stream RTSP, menandai dan tracking orang, menyimpan gambar jika terdeteksi cukup lama, serta mengirim notifikasi dan log ke API eksternal secara asinkron. Semua konfigurasi (model, threshold, API, storage, ROI) diatur melalui file YAML. Logging detail tersedia untuk debugging dan audit.
 # --- Konfigurasi Logging ---
-def setup_logger(log_path_str: str):
-    """Menginisialisasi logger untuk menyimpan log ke file dan menampilkan di konsol."""
+_log_listener = None
+
+
+def _stop_log_listener():
+    """Menulis sisa record di antrian lalu menutup handler file (dipanggil saat proses keluar)."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
+
+
+def setup_logger(log_path_str: str, logging_cfg: dict = None):
+    """
+    Menginisialisasi logger untuk menyimpan log ke file (teks dan JSONL) dan menampilkan di konsol.
+    Logger hanya memasukkan record ke antrian; QueueListener menulisnya di thread terpisah.
+    """
+    global _log_listener
+    logging_cfg = logging_cfg or {}
     log_path = Path(log_path_str)
     log_path.parent.mkdir(parents=True, exist_ok=True)
     
@@ -74,6 +129,19 @@ def setup_logger(log_path_str: str):
     # Mencegah duplikasi handler jika fungsi ini dipanggil lagi
     if logger.hasHandlers():
         logger.handlers.clear()
+    logger.filters.clear()
+    _stop_log_listener()
+
+    rotation = logging_cfg.get('rotation', 'size')
+    if rotation not in ROTATION_MODES:
+        rotation = 'size'
+    rotation_args = dict(
+        rotation=rotation,
+        max_mb=logging_cfg.get('max_mb', 50),
+        when=logging_cfg.get('when', 'midnight'),
+        backup_count=logging_cfg.get('backup_count', 7),
+        compress=logging_cfg.get('compress', True),
+    )
 
     # Handler untuk konsol
     c_handler = logging.StreamHandler()
@@ -81,14 +149,29 @@ def setup_logger(log_path_str: str):
     c_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     c_handler.setFormatter(c_format)
     
-    # Handler untuk file
-    f_handler = logging.FileHandler(log_path)
-    f_handler.setLevel(logging.DEBUG)
+    # Handler untuk file (dirotasi dan dikompresi)
+    f_handler = build_file_handler(str(log_path), **rotation_args)
+    f_handler.setLevel(logging_cfg.get('file_level', 'DEBUG'))
     f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     f_handler.setFormatter(f_format)
-    
-    logger.addHandler(c_handler)
-    logger.addHandler(f_handler)
+    handlers = [c_handler, f_handler]
+
+    # Stream JSONL untuk diolah mesin (opsional)
+    jsonl_cfg = logging_cfg.get('jsonl', {})
+    if jsonl_cfg.get('enabled', False):
+        jsonl_path = Path(jsonl_cfg.get('path', './data/logs/events.jsonl'))
+        jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        j_handler = build_file_handler(str(jsonl_path), **rotation_args)
+        j_handler.setLevel(jsonl_cfg.get('level', 'INFO'))
+        j_handler.setFormatter(JsonlFormatter())
+        handlers.append(j_handler)
+
+    # Thread deteksi dan worker tidak pernah menunggu disk/konsol: record masuk antrian, ditulis oleh listener.
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(StructuredQueueHandler(log_queue))
+    logger.addFilter(RateLimitFilter(logging_cfg.get('rate_limit_sec', 60)))
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
     
     return logger
 
@@ -97,95 +180,253 @@ class RealTimeDetector:
     Kelas utama untuk menjalankan deteksi objek secara real-time dari stream RTSP.
     Menggunakan pemrosesan asinkron untuk tugas I/O (menyimpan file, mengirim API).
     """
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, model=None):
+        self.started_at = time.monotonic()
+        self.config_path = config_path
         self.config = self._load_config(config_path)
-        self.logger = setup_logger(self.config['storage']['log_path'])
+        self.logger = setup_logger(self.config['storage']['log_path'], self.config.get('logging', {}))
         
         self.logger.info("🚀 Memulai inisialisasi sistem deteksi...")
         
-        # Inisialisasi Model
+        # Inisialisasi Model (model dapat diberikan dari luar, misalnya model tiruan untuk benchmark).
         self.device = self.config['processing']['device']
-        self.model = YOLO(self.config['model']['path'])
-        self.model.to(self.device)
-        self.logger.info(f"Model '{self.config['model']['path']}' dimuat ke perangkat '{self.device}'.")
-
-        # Konfigurasi ROI
-        self.roi_points = np.array(self.config['processing']['roi_points'], dtype=np.int32) if self.config['processing']['enable_roi'] else None
-
-        # State Management
-        self.tracked_persons = defaultdict(lambda: {"first_seen": None, "last_seen": None, "notified": False})
+        # Backend (torch/onnxruntime/openvino), imgsz, thread, dan warm-up diatur di 'model' (model_backend.py).
+        # Dengan pool inferensi multi-proses, model dimuat di setiap worker process, bukan di proses utama.
+        pool_cfg = self.config['processing'].get('inference_pool', {})
+        self.use_inference_pool = model is None and pool_cfg.get('enabled', False)
+        # Model dimuat di thread latar belakang agar stream kamera dapat dibuka bersamaan; lihat wait_for_model().
+        self.model = model
+        self._model_future = None
+        if model is None and not self.use_inference_pool:
+            loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+            self._model_future = loader.submit(load_detection_model, self.config['model'], self.device, self.logger)
+            loader.shutdown(wait=False)
+        self._first_inference_logged = False
+        self._first_detection_logged = False
+
+        # Jam untuk logika persistence (dapat diganti jam deterministik saat replay),
+        # pengukur durasi tahap pipeline, dan sinyal berhenti untuk loop deteksi.
+        self.clock = time.time
+        self.stage_timer = NullStageTimer()
+        self.stop_event = threading.Event()
+
+        # Kamera: setiap kamera memiliki ROI, tracker, dan tracked_persons sendiri.
+        self.frame_event = threading.Event()
+        self.cameras = self._build_cameras()
+        self.inference_pool = None
+        if self.use_inference_pool:
+            self.inference_pool = InferencePool(
+                self.config['model'], self.device, [cam.name for cam in self.cameras], self.logger,
+                workers=pool_cfg.get('workers', 2),
+                slots_per_camera=pool_cfg.get('slots_per_camera', 2),
+                timeout_sec=pool_cfg.get('timeout_sec', 5.0),
+                max_restarts=pool_cfg.get('max_restarts', 3),
+            )
         
-        # Asynchronous Executor
-        self.executor = ThreadPoolExecutor(max_workers=5) 
+        # Antrian notifikasi terbatas + worker thread untuk tugas I/O (menyimpan file, mengirim API).
+        notif_cfg = self.config.get('notifications', {})
+        self.event_queue = EventQueue(
+            maxsize=notif_cfg.get('queue_size', 32),
+            overflow_policy=notif_cfg.get('overflow_policy', 'drop_oldest'),
+        )
+        self.notifier = Notifier(self.config['api'], self.logger, outbox_cfg=self.config['storage'].get('outbox', {}))
+        self.notification_workers = [
+            threading.Thread(target=self._notification_worker, name=f"notifier-{i + 1}", daemon=True)
+            for i in range(notif_cfg.get('workers', 5))
+        ]
 
         self.confidence_threshold = self.config['model']['confidence_threshold']
         self.target_class = self.config['model']['target_class']
         self.persistence_threshold = self.config['tracking']['persistence_threshold_sec']
+        self.jpeg_cfg = self.config['storage'].get('jpeg', {})
+
+        # Pengendali beban adaptif (opsional): menjaga latensi frame di sekitar target.
+        shed_cfg = self.config['processing'].get('load_shedding', {})
+        self.load_shedder = None
+        if shed_cfg.get('enabled', False):
+            steps = tuple(shed_cfg.get('steps', SHED_STEPS))
+            # Model yang dimuat dari config (DetectionModel) selalu memiliki imgsz; model dari luar belum tentu.
+            if 'imgsz' in steps and (self.inference_pool is not None or (model is not None and not hasattr(model, 'imgsz'))):
+                # Dengan pool inferensi, model berada di worker process sehingga imgsz tidak dapat diubah dari sini.
+                self.logger.info("Langkah 'imgsz' pengendali beban dilewati: imgsz model tidak dapat diubah saat berjalan.")
+                steps = tuple(step for step in steps if step != 'imgsz')
+            self.load_shedder = LoadShedder(
+                self.logger,
+                target_latency_ms=shed_cfg.get('target_latency_ms', 250),
+                window_sec=shed_cfg.get('window_sec', 5),
+                restore_ratio=shed_cfg.get('restore_ratio', 0.6),
+                hold_sec=shed_cfg.get('hold_sec', 15),
+                steps=steps,
+                skip_frames=shed_cfg.get('skip_frames', 1),
+            )
+            self.normal_imgsz = None  # imgsz asli model, dibaca saat langkah 'imgsz' pertama kali diterapkan
+            self.shed_imgsz = shed_cfg.get('imgsz', 416)
+            self.shed_jpeg_quality = shed_cfg.get('jpeg_quality', 70)
+
+        # Tampilan: jendela OpenCV hanya jika tidak headless; preview MJPEG opsional untuk server tanpa layar.
+        display_cfg = self.config.get('display', {})
+        self.show_window = not display_cfg.get('headless', False)
+        preview_cfg = display_cfg.get('preview', {})
+        self.preview = None
+        if preview_cfg.get('enabled', False):
+            self.preview = MjpegPreviewServer(
+                [cam.name for cam in self.cameras], self.logger,
+                host=preview_cfg.get('host', '127.0.0.1'),
+                port=preview_cfg.get('port', 8080),
+                jpeg_quality=preview_cfg.get('jpeg_quality', 70),
+                default_fps=preview_cfg.get('default_fps', 5),
+                max_fps=preview_cfg.get('max_fps', 15),
+            )
+
+        # Hot-reload config (opsional): file diperiksa di antara batch frame; model baru dimuat di latar belakang.
+        reload_cfg = self.config.get('config_reload', {})
+        self.config_watcher = None
+        self._model_swap = None   # (future, device) selama model baru dimuat
+        if reload_cfg.get('enabled', False):
+            self.config_watcher = ConfigWatcher(config_path, self.logger, interval_sec=reload_cfg.get('interval_sec', 2))
+
+        # Metrik Prometheus (opsional): registry dipasang sebagai stage_timer sehingga setiap tahap pipeline tercatat.
+        metrics_cfg = self.config.get('metrics', {})
+        self.metrics = None
+        self.metrics_server = None
+        self.log_metrics_summary = False
+        if metrics_cfg.get('enabled', False):
+            self.metrics = MetricsRegistry()
+            self.metrics.add_collector(self._collect_metrics)
+            self.stage_timer = self.metrics
+            self.metrics_server = MetricsServer(
+                self.metrics, self.logger,
+                host=metrics_cfg.get('host', '127.0.0.1'),
+                port=metrics_cfg.get('port', 9100),
+            )
+            self.log_metrics_summary = metrics_cfg.get('log_summary', True)
 
     def _load_config(self, path: str):
         """Memuat konfigurasi dari file YAML."""
         with open(path, 'r') as f:
             return yaml.safe_load(f)
 
-
-    def _process_detections(self, original_frame: np.ndarray, display_frame: np.ndarray, results: list):
-        """Memproses hasil deteksi dan MENGGAMBAR pada display_frame."""
-        if results[0].boxes is None:
+    def _build_cameras(self) -> list:
+        """
+        Membuat CameraContext untuk setiap kamera di 'cameras'.
+        Blok 'camera' tunggal (format lama) tetap didukung sebagai daftar berisi satu kamera.
+        """
+        camera_cfgs = self.config.get('cameras')
+        if camera_cfgs is None:
+            camera_cfgs = [self.config['camera']]
+
+        cameras = []
+        for index, camera_cfg in enumerate(camera_cfgs):
+            name = camera_cfg.get('name', f"camera-{index + 1}")
+            capture_cfg = {**self.config.get('capture', {}), **camera_cfg.get('capture', {})}
+            motion_cfg = {**self.config['processing'].get('motion_gate', {}), **camera_cfg.get('motion_gate', {})}
+            cameras.append(CameraContext(
+                name, camera_cfg, self.config['processing'], capture_cfg, self.logger,
+                track_timeout_sec=self.config['tracking']['disappearance_timeout_sec'],
+                motion_cfg=motion_cfg, frame_event=self.frame_event,
+                clip_cfg=self.config['storage'].get('clips', {}),
+                sparse_cfg={**self.config['processing'].get('sparse_inference', {}), **camera_cfg.get('sparse_inference', {})},
+            ))
+        self.logger.info(f"🎛️ {len(cameras)} kamera dikonfigurasi: {', '.join(cam.name for cam in cameras)}")
+        return cameras
+
+
+    def _draw_detections(self, frame: np.ndarray, coords: np.ndarray, track_ids: np.ndarray, confidences: np.ndarray):
+        """Menggambar kotak dan label untuk setiap box pada frame."""
+        for (x1, y1, x2, y2), track_id, confidence in zip(coords, track_ids, confidences):
+            label = f"Person {track_id} - {int(confidence * 100)}%"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    def _process_detections(self, cam: CameraContext, original_frame: np.ndarray, display_frame: np.ndarray, tracks: np.ndarray):
+        """
+        Memproses hasil deteksi dan MENGGAMBAR pada display_frame.
+        display_frame bernilai None jika tidak ada yang menonton; menggambar dilewati.
+        """
+        if len(tracks) == 0:
             return
 
-        for box in results[0].boxes:
-            if box.conf[0] < self.confidence_threshold or int(box.cls[0]) != self.target_class:
-                continue
-            if box.id is None:
-                continue
-            
-            track_id = int(box.id[0])
-            coords = box.xyxy[0].cpu().numpy().astype(int)
-            x1, y1, x2, y2 = coords
-            
-            center_point = (int((x1 + x2) / 2), int((y1 + y2) / 2))
-            if self.roi_points is not None and cv2.pointPolygonTest(self.roi_points, center_point, False) < 0:
-                continue 
-                
-            confidence_percent = int(box.conf[0] * 100)
-            label = f"Person {track_id} - {confidence_percent}%"
-
-            # --- PERBAIKAN UTAMA DI SINI ---
-            # Pastikan menggambar pada 'display_frame'
-            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(display_frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            # --- AKHIR PERBAIKAN ---
-
-            current_time = time.time()
-            if self.tracked_persons[track_id]["first_seen"] is None:
-                self.tracked_persons[track_id]["first_seen"] = current_time
-            
-            self.tracked_persons[track_id]["last_seen"] = current_time
+        # Filter confidence, kelas, dan ROI dilakukan sekaligus untuk semua box.
+        coords = tracks[:, :4].astype(int)
+        track_ids = tracks[:, 4].astype(int)
+        confidences = tracks[:, 5]
+        classes = tracks[:, 6].astype(int)
+
+        keep = (confidences >= self.confidence_threshold) & (classes == self.target_class)
+        if cam.roi_points is not None:
+            centers = (coords[:, 0:2] + coords[:, 2:4]) // 2
+            keep &= cam.roi_contains(centers)
+
+        rows = np.flatnonzero(keep)
+        if len(rows) and not self._first_detection_logged:
+            # Time-to-first-detection: box target pertama yang lolos filter confidence, kelas, dan ROI.
+            self._first_detection_logged = True
+            self.logger.info(
+                f"🎯 [{cam.name}] Deteksi pertama {time.monotonic() - self.started_at:.2f} detik setelah inisialisasi.",
+                extra={"event": "first_detection", "camera": cam.name,
+                       "elapsed_sec": round(time.monotonic() - self.started_at, 2)},
+            )
+        if display_frame is not None:
+            self._draw_detections(display_frame, coords[rows], track_ids[rows], confidences[rows])
+
+        current_time = self.clock()
+        for i in rows:
+            track_id = int(track_ids[i])
+            x1, y1, x2, y2 = coords[i]
+            confidence = float(confidences[i])
+
+            person = cam.tracked_persons.touch(track_id, current_time)
             
-            detection_duration = current_time - self.tracked_persons[track_id]["first_seen"]
-            if detection_duration >= self.persistence_threshold and not self.tracked_persons[track_id]["notified"]:
-                self.logger.info(f"✅ Deteksi valid untuk ID: {track_id}. Durasi: {detection_duration:.2f}s. Mengirim tugas notifikasi.")
+            detection_duration = current_time - person.first_seen
+            if detection_duration >= self.persistence_threshold and not person.notified:
+                self.logger.info(
+                    f"✅ [{cam.name}] Deteksi valid untuk ID: {track_id}. Durasi: {detection_duration:.2f}s. Mengirim tugas notifikasi.",
+                    extra={"event": "detection", "camera": cam.name, "track_id": track_id,
+                           "confidence": round(confidence, 3), "duration_sec": round(detection_duration, 2)},
+                )
                 
-                self.tracked_persons[track_id]["notified"] = True
+                person.notified = True
+                if cam.clip_recorder is not None:
+                    cam.clip_recorder.trigger(current_time, track_id)
                 
-                crop_img = original_frame[y1:y2, x1:x2]
-
-                self.executor.submit(
-                    self._handle_persistent_detection, 
-                    original_frame, 
-                    display_frame.copy(), # Kirim salinan display_frame ke thread lain
-                    crop_img, 
-                    track_id, 
-                    box.conf[0]
-                )
+                # Event hanya membawa gambar yang dibutuhkan sink aktif: crop disalin agar frame penuh
+                # tidak ikut tertahan di antrian, dan frame beranotasi hanya jika 'framerecord' aktif.
+                if self.config['storage']['captures']['save_crop']:
+                    capture_img = original_frame[y1:y2, x1:x2].copy()
+                else:
+                    capture_img = original_frame
+
+                annotated_frame = None
+                if self._framerecord_enabled():
+                    if display_frame is not None:
+                        annotated_frame = display_frame.copy() # Kirim salinan display_frame ke thread lain
+                    else:
+                        annotated_frame = original_frame.copy()
+                        self._draw_detections(annotated_frame, coords[rows], track_ids[rows], confidences[rows])
+
+                event = DetectionEvent(cam.name, track_id, confidence, capture_img, annotated_frame)
+                if not self.event_queue.put(event):
+                    self.logger.warning(f"⚠️ [{cam.name}] Antrian notifikasi penuh. Event ID {track_id} dibuang.")
     
-    def _handle_persistent_detection(self, original_frame: np.ndarray, display_frame: np.ndarray, crop_img: np.ndarray, track_id: int, confidence: float):
+    def _notification_worker(self):
+        """Worker yang mengambil event dari antrian notifikasi sampai antrian ditutup dan kosong."""
+        while True:
+            event = self.event_queue.get(timeout=1.0)
+            if event is None:
+                if self.event_queue.closed:
+                    return
+                continue
+            with self.stage_timer.measure("io_sinks"):
+                self._handle_persistent_detection(event)
+
+    def _handle_persistent_detection(self, event: DetectionEvent):
         """
         Tugas asinkron untuk menyimpan gambar ke folder 'captures' dan 'framerecord'
         sesuai dengan konfigurasi.
         """
+        camera_name, track_id, confidence = event.camera_name, event.track_id, event.confidence
         try:
-            timestamp = datetime.now()
+            timestamp = event.detected_at
             date_folder = timestamp.strftime('%Y-%m-%d')
             time_str = timestamp.strftime('%H%M%S')
 
@@ -193,134 +434,533 @@ class RealTimeDetector:
             capture_path = Path(self.config['storage']['captures']['path']) / date_folder
             capture_path.mkdir(parents=True, exist_ok=True)
             
-            # Pilih antara menyimpan crop atau frame asli
-            img_to_save_for_capture = crop_img if self.config['storage']['captures']['save_crop'] else original_frame
-            capture_filename = capture_path / f"capture_id_{track_id}_{time_str}.jpg"
-            cv2.imwrite(str(capture_filename), img_to_save_for_capture)
-            self.logger.info(f"🖼️ Gambar asli disimpan: {capture_filename}")
+            # Event sudah berisi crop atau frame asli sesuai 'save_crop'.
+            # Gambar di-encode sekali; buffer yang sama dipakai untuk disk dan notifikasi.
+            capture_jpeg = self._encode_jpeg(event.capture_img)
+            capture_filename = capture_path / f"capture_{camera_name}_id_{track_id}_{time_str}.jpg"
+            write_atomic(capture_filename, capture_jpeg)
+            self.logger.info(
+                f"🖼️ Gambar asli disimpan: {capture_filename} ({len(capture_jpeg) / 1024:.0f} KB)",
+                extra={"event": "capture_saved", "camera": camera_name, "track_id": track_id, "path": str(capture_filename)},
+            )
 
             # --- 2. Logika Penyimpanan untuk 'framerecord' (Dengan Kotak Deteksi) ---
-            if self.config['storage']['framerecord']['enabled']:
+            if event.framerecord_img is not None:
                 framerecord_path = Path(self.config['storage']['framerecord']['path']) / date_folder
                 framerecord_path.mkdir(parents=True, exist_ok=True)
                 
-                framerecord_filename = framerecord_path / f"framerecord_id_{track_id}_{time_str}.jpg"
-                cv2.imwrite(str(framerecord_filename), display_frame)
-                self.logger.info(f"🎥 Frame display disimpan: {framerecord_filename}")
+                framerecord_filename = framerecord_path / f"framerecord_{camera_name}_id_{track_id}_{time_str}.jpg"
+                write_atomic(framerecord_filename, self._encode_jpeg(event.framerecord_img))
+                self.logger.info(
+                    f"🎥 Frame display disimpan: {framerecord_filename}",
+                    extra={"event": "framerecord_saved", "camera": camera_name, "track_id": track_id,
+                           "path": str(framerecord_filename)},
+                )
             
-            # --- 3. Logika Pengiriman Notifikasi (Tetap Sama) ---
-            filepath_for_notif = capture_filename # Kirim crop/gambar asli di notifikasi
+            # --- 3. Logika Pengiriman Notifikasi ---
+            # Kirim crop/gambar asli di notifikasi langsung dari buffer JPEG (tanpa membuka ulang file).
 
             if self.config['api']['whatsapp']['enabled']:
                 self.logger.debug("Fitur WhatsApp aktif, mencoba mengirim notifikasi.")
-                self._send_api_request(
+                self.notifier.send(
                     url=self.config['api']['whatsapp']['endpoint'],
                     json_data={
                         "recipient": "PHONE_NUMBER",
-                        "message": f"🔴 Peringatan Keamanan! 🔴\nTerdeteksi seseorang (ID: {track_id}) pada {timestamp.strftime('%Y-%m-%d %H:%M:%S')}."
+                        "message": f"🔴 Peringatan Keamanan! 🔴\nTerdeteksi seseorang (ID: {track_id}) di kamera {camera_name} pada {timestamp.strftime('%Y-%m-%d %H:%M:%S')}."
                     },
-                    files={"attachment": open(filepath_for_notif, 'rb')},
+                    files={"attachment": (capture_filename.name, capture_jpeg, "image/jpeg")},
                     service_name="WhatsApp"
                 )
 
             if self.config['api']['log_server']['enabled']:
-                self.logger.debug("Fitur Log Server aktif, mencoba mengirim log.")
-                self._send_api_request(
-                    url=self.config['api']['log_server']['endpoint'],
-                    json_data={
-                        "event": "person_detected", "track_id": track_id,
-                        "timestamp": timestamp.isoformat(), "confidence": f"{confidence:.2f}",
-                        "image_path": str(capture_filename)
-                    },
-                    service_name="ZAI Log Server"
-                )
+                self.logger.debug("Fitur Log Server aktif, menambahkan log ke batch.")
+                self.notifier.log_event({
+                    "event": "person_detected", "camera": camera_name, "track_id": track_id,
+                    "timestamp": timestamp.isoformat(), "confidence": f"{confidence:.2f}",
+                    "image_path": str(capture_filename),
+                    "merged_track_ids": event.merged_track_ids
+                })
 
         except Exception as e:
-            self.logger.error(f"Error pada _handle_persistent_detection untuk ID {track_id}: {e}", exc_info=True)
-
-    def _send_api_request(self, url: str, json_data: dict, service_name: str, files: dict = None, retries: int = 3):
-        """Mengirim request API dengan mekanisme retry."""
-        headers = {"Authorization": f"Bearer {self.config['api']['api_key']}"}
-        for attempt in range(retries):
-            try:
-                response = requests.post(url, headers=headers, json=json_data, files=files, timeout=10)
-                response.raise_for_status() 
-                self.logger.info(f"✔️ Notifikasi {service_name} berhasil dikirim. Status: {response.status_code}")
-                return
-            except requests.RequestException as e:
-                self.logger.warning(f"Gagal mengirim notifikasi {service_name} (Percobaan {attempt + 1}/{retries}): {e}")
-                time.sleep(2 ** attempt)
-        self.logger.error(f"❌ Gagal total mengirim notifikasi {service_name} setelah {retries} percobaan.")
+            self.logger.error(f"Error pada _handle_persistent_detection untuk kamera {camera_name} ID {track_id}: {e}", exc_info=True)
+
+    def _framerecord_enabled(self) -> bool:
+        """Penyimpanan framerecord aktif di config dan tidak sedang dimatikan oleh pengendali beban."""
+        if not self.config['storage']['framerecord']['enabled']:
+            return False
+        return self.load_shedder is None or not self.load_shedder.active('framerecord')
+
+    def _apply_load_level(self):
+        """Menerapkan tingkat degradasi pengendali beban yang baru ke model (langkah lain dibaca saat dipakai)."""
+        if 'imgsz' in self.load_shedder.steps:
+            if self.normal_imgsz is None:
+                self.normal_imgsz = self.model.imgsz
+            self.model.imgsz = self.shed_imgsz if self.load_shedder.active('imgsz') else self.normal_imgsz
+
+    def _encode_jpeg(self, img: np.ndarray) -> bytes:
+        """Meng-encode gambar ke JPEG sesuai pengaturan 'storage.jpeg' (kualitas dan batas ukuran)."""
+        quality = self.jpeg_cfg.get('quality', 95)
+        if self.load_shedder is not None and self.load_shedder.active('jpeg_quality'):
+            quality = min(quality, self.shed_jpeg_quality)
+        return encode_jpeg(
+            img,
+            quality=quality,
+            max_width=self.jpeg_cfg.get('max_width', 0),
+            max_height=self.jpeg_cfg.get('max_height', 0),
+            max_bytes=self.jpeg_cfg.get('max_bytes', 0),
+        )
+
+    def _log_queue_stats(self):
+        """Mencatat kedalaman antrian notifikasi, waktu tunggu, dan jumlah event dibuang/digabung."""
+        stats = self.event_queue.stats()
+        self.logger.info(
+            f"📨 Antrian notifikasi: {stats['depth']}/{self.event_queue.maxsize} (maks {stats['max_depth']}), "
+            f"tunggu rata-rata {stats['avg_wait_sec'] * 1000:.0f} ms, maks {stats['max_wait_sec'] * 1000:.0f} ms. "
+            f"Total {stats['enqueued']} masuk, {stats['dropped']} dibuang, {stats['coalesced']} digabung."
+        )
+        for service_name, service_stats in self.notifier.stats().items():
+            count = service_stats['latency_count']
+            avg_latency_ms = service_stats['latency_total'] / count * 1000 if count else 0.0
+            self.logger.info(
+                f"📡 API {service_name}: {service_stats['success']} sukses, {service_stats['failure']} gagal, "
+                f"{service_stats['retries']} retry, latensi rata-rata {avg_latency_ms:.0f} ms."
+            )
+        if self.notifier.outbox is not None:
+            outbox_stats = self.notifier.outbox.stats()
+            self.logger.info(
+                f"📮 Outbox: {outbox_stats['pending']} notifikasi tertunda ({outbox_stats['bytes'] / 1024 / 1024:.1f} MB), "
+                f"{outbox_stats['delivered']} terkirim, {outbox_stats['dropped']} dibuang karena penuh, "
+                f"{outbox_stats['rejected']} ditolak server."
+            )
+        if self.load_shedder is not None:
+            self.logger.info(
+                f"🎚️ Pengendali beban: mode '{self.load_shedder.mode()}', latensi frame p95 terakhir "
+                f"{self.load_shedder.last_p95 * 1000:.0f} ms (target {self.load_shedder.target * 1000:.0f} ms), "
+                f"{self.load_shedder.mode_changes} perubahan mode, {self.load_shedder.frames_skipped} frame dilewati."
+            )
 
-    def run(self):
-        """Loop utama untuk menangkap dan memproses stream video dari sumber yang dipilih."""
-        
-        # --- Memilih Sumber Video Berdasarkan Konfigurasi ---
-        source_type = self.config['camera']['source_type'].lower()
-        video_source = None
-
-        if source_type == 'rtsp':
-            video_source = self.config['camera']['rtsp_url']
-            self.logger.info(f"📹 Menggunakan sumber video RTSP: {video_source}")
-        elif source_type == 'webcam':
-            video_source = self.config['camera']['webcam_id']
-            self.logger.info(f"📷 Menggunakan sumber video Webcam dengan ID: {video_source}")
+    def _collect_metrics(self) -> list:
+        """Collector metrik: membaca statistik kamera, antrian notifikasi, dan API saat endpoint di-scrape."""
+        samples = []
+        for cam in self.cameras:
+            labels = {"camera": cam.name}
+            capture_stats = cam.grabber.stats()
+            samples += [
+                ("camera_fps", labels, cam.effective_fps()),
+                ("frames_captured_total", labels, capture_stats['frames_captured']),
+                ("frames_dropped_total", labels, capture_stats['frames_dropped']),
+                ("frames_gated_total", labels, cam.total_frames_gated),
+                ("frames_propagated_total", labels, cam.propagator.frames_propagated if cam.propagator else 0),
+                ("reconnects_total", labels, capture_stats['reconnects']),
+                ("tracks_active", labels, len(cam.tracked_persons)),
+            ]
+
+        queue_stats = self.event_queue.stats(reset_wait=False)
+        samples.append(("notification_queue_depth", {}, queue_stats['depth']))
+        for result in ("enqueued", "dropped", "coalesced"):
+            samples.append(("notification_events_total", {"result": result}, queue_stats[result]))
+
+        for service_name, service_stats in self.notifier.stats().items():
+            for result, key in (("success", "success"), ("failure", "failure"), ("retry", "retries")):
+                samples.append(("api_requests_total", {"service": service_name, "result": result}, service_stats[key]))
+            samples.append(("api_latency_seconds", {"service": service_name},
+                            (service_stats['latency_total'], service_stats['latency_count'])))
+
+        if self.load_shedder is not None:
+            samples += [
+                ("load_shed_level", {}, self.load_shedder.level),
+                ("load_shed_mode_changes_total", {}, self.load_shedder.mode_changes),
+                ("load_shed_frames_skipped_total", {}, self.load_shedder.frames_skipped),
+            ]
+
+        if self.notifier.outbox is not None:
+            outbox_stats = self.notifier.outbox.stats()
+            samples += [
+                ("outbox_pending", {}, outbox_stats['pending']),
+                ("outbox_size_bytes", {}, outbox_stats['bytes']),
+                ("outbox_dropped_total", {}, outbox_stats['dropped']),
+                ("outbox_rejected_total", {}, outbox_stats['rejected']),
+            ]
+        return samples
+
+    def _log_stage_summary(self):
+        """Mencatat ringkasan latensi per tahap pipeline sejak ringkasan sebelumnya."""
+        summary = self.metrics.stage_summary()
+        if not summary:
+            return
+        parts = [f"{stage} {values['mean_ms']:.1f} ms (p95 ≤ {values['p95_ms']:g} ms)" for stage, values in summary.items()]
+        self.logger.info(f"⏱️ Latensi tahap: {', '.join(parts)}")
+
+    def _check_config_reload(self):
+        """Dipanggil di antara batch: menyelesaikan penggantian model dan menerapkan config baru jika ada."""
+        if self._model_swap is not None and self._model_swap[0].done():
+            self._finish_model_swap()
+        if self.config_watcher is None:
+            return
+        new_config = self.config_watcher.poll(time.monotonic())
+        if new_config is not None:
+            self._apply_config(new_config)
+
+    def _apply_config(self, new_config: dict):
+        """
+        Menerapkan config baru yang sudah divalidasi: ROI, threshold, penyimpanan, dan API langsung berlaku
+        untuk batch berikutnya; perubahan model/device memulai penggantian model di latar belakang.
+        Seluruh state baru dibangun lebih dulu; jika ada yang gagal, config lama tetap dipakai utuh.
+        """
+        try:
+            plan = self._plan_config(new_config)
+            # Notifier membaca dan memeriksa seluruh pengaturan 'api' sebelum menerapkannya, jadi diterapkan paling awal.
+            if plan["api_changed"]:
+                self.notifier.update_config(new_config['api'])
+        except Exception as e:
+            self.logger.error(f"❌ Config baru tidak dapat diterapkan, config lama tetap dipakai: {e}", exc_info=True)
+            return
+
+        # Semua nilai sudah dibaca dan dihitung; di bawah ini hanya penugasan state.
+        for cam, roi in plan["rois"].items():
+            cam.apply_roi(roi)
+        for name, value in plan["thresholds"].items():
+            setattr(self, name, value)
+        if plan["track_timeout"] is not None:
+            for cam in self.cameras:
+                cam.tracked_persons.timeout_sec = plan["track_timeout"]
+        self.jpeg_cfg = plan["jpeg_cfg"]
+        self.config = new_config
+        if plan["model_changed"] and self.inference_pool is None:
+            self._start_model_swap(new_config['model'], plan["device"])
+
+        applied, restart_needed = plan["applied"], plan["restart_needed"]
+        if applied:
+            self.logger.info(f"🔁 Config dimuat ulang tanpa restart: {', '.join(applied)}.")
+        elif not plan["model_changed"] and not restart_needed:
+            self.logger.info("🔁 Config dimuat ulang; tidak ada perubahan yang perlu diterapkan.")
+        if restart_needed:
+            self.logger.warning(
+                f"⚠️ Perubahan config berikut baru berlaku setelah restart: {', '.join(dict.fromkeys(restart_needed))}."
+            )
+
+    def _plan_config(self, new_config: dict) -> dict:
+        """Membandingkan config lama dan baru lalu membangun state baru tanpa mengubah state detektor."""
+        old_config = self.config
+        applied, restart_needed = [], []
+
+        def camera_cfgs(config: dict) -> dict:
+            cfgs = config.get('cameras') or [config['camera']]
+            return {cfg.get('name', f"camera-{index + 1}"): cfg for index, cfg in enumerate(cfgs)}
+
+        def without(cfg: dict, keys: tuple) -> dict:
+            return {key: value for key, value in cfg.items() if key not in keys}
+
+        # ROI per kamera (kamera dicocokkan berdasarkan nama); sumber video dan pengaturan lain memerlukan restart.
+        old_cameras, new_cameras = camera_cfgs(old_config), camera_cfgs(new_config)
+        if list(old_cameras) != list(new_cameras):
+            restart_needed.append("daftar kamera")
+        old_processing, new_processing = old_config['processing'], new_config['processing']
+        rois = {}
+        for cam in self.cameras:
+            old_cfg, new_cfg = old_cameras.get(cam.name), new_cameras.get(cam.name)
+            if old_cfg is None or new_cfg is None:
+                continue
+            old_roi = [old_cfg.get(key, old_processing.get(key)) for key in ROI_KEYS]
+            new_roi = [new_cfg.get(key, new_processing.get(key)) for key in ROI_KEYS]
+            if old_roi != new_roi:
+                rois[cam] = cam.resolve_roi(new_cfg, new_processing)
+                applied.append(f"ROI {cam.name}")
+            if without(old_cfg, ROI_KEYS) != without(new_cfg, ROI_KEYS):
+                restart_needed.append(f"kamera {cam.name}")
+        if without(old_processing, ROI_KEYS + ("device",)) != without(new_processing, ROI_KEYS + ("device",)):
+            restart_needed.append("processing")
+
+        # Threshold deteksi dan tracking.
+        thresholds = {}
+        for name, value in (
+            ("confidence_threshold", new_config['model']['confidence_threshold']),
+            ("target_class", new_config['model']['target_class']),
+            ("persistence_threshold", new_config['tracking']['persistence_threshold_sec']),
+        ):
+            if getattr(self, name) != value:
+                thresholds[name] = value
+                applied.append(f"{name}={value}")
+        track_timeout = new_config['tracking']['disappearance_timeout_sec']
+        if track_timeout != old_config['tracking']['disappearance_timeout_sec']:
+            applied.append(f"disappearance_timeout_sec={track_timeout}")
         else:
-            self.logger.error(f"Tipe sumber '{source_type}' tidak valid. Menggunakan webcam default (ID: 0) sebagai fallback.")
-            video_source = 0
-            
-        cap = cv2.VideoCapture(video_source)
-        if not cap.isOpened():
-            self.logger.critical(f"❌ Gagal total membuka sumber video: {video_source}")
+            track_timeout = None
+
+        # Sink: path captures/framerecord dan JPEG dibaca dari self.config saat event diproses; API di Notifier.
+        sink_keys = ("captures", "framerecord", "jpeg")
+        jpeg_cfg = self.jpeg_cfg
+        if any(old_config['storage'].get(key) != new_config['storage'].get(key) for key in sink_keys):
+            jpeg_cfg = new_config['storage'].get('jpeg', {})
+            applied.append("storage")
+        if without(old_config['storage'], sink_keys) != without(new_config['storage'], sink_keys):
+            restart_needed.append("storage")
+        api_changed = old_config['api'] != new_config['api']
+        if api_changed:
+            applied.append("api")
+        restart_needed += [
+            section for section in RESTART_SECTIONS if old_config.get(section) != new_config.get(section)
+        ]
+
+        # Model: hanya perubahan yang memengaruhi pemuatan model (path, device, ...) memicu penggantian model.
+        new_device = new_processing['device']
+        model_changed = new_device != old_processing['device'] or any(
+            old_config['model'].get(key) != new_config['model'].get(key) for key in MODEL_LOAD_KEYS
+        )
+        if model_changed and self.inference_pool is not None:
+            restart_needed.append("model (pool inferensi)")
+
+        return {
+            "rois": rois, "thresholds": thresholds, "track_timeout": track_timeout, "jpeg_cfg": jpeg_cfg,
+            "api_changed": api_changed, "model_changed": model_changed, "device": new_device,
+            "applied": applied, "restart_needed": restart_needed,
+        }
+
+    def _start_model_swap(self, model_cfg: dict, device: str):
+        """Memuat model baru di thread latar belakang; model lama tetap dipakai sampai model baru siap."""
+        self.logger.info(f"🔄 Memuat model '{model_cfg['path']}' ({device}) di latar belakang; deteksi tetap berjalan dengan model lama.")
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-swap")
+        # Jika penggantian sebelumnya belum selesai, hasilnya diabaikan dan digantikan yang terbaru.
+        self._model_swap = (loader.submit(load_detection_model, dict(model_cfg), device, self.logger), device)
+        loader.shutdown(wait=False)
+
+    def _finish_model_swap(self):
+        """Mengganti model di antara batch setelah model baru selesai dimuat."""
+        future, device = self._model_swap
+        self._model_swap = None
+        try:
+            model = future.result()
+        except Exception as e:
+            self.logger.error(f"❌ Gagal memuat model baru, model lama tetap dipakai: {e}", exc_info=True)
             return
-            
-        self.logger.info("✅ Sumber video berhasil dibuka. Memulai deteksi...")
-        
-        roi_mask = None
-        if self.roi_points is not None:
-            ret, frame = cap.read()
-            if ret:
-                roi_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-                cv2.fillPoly(roi_mask, [self.roi_points], 255)
+        self.model = model
+        self.device = device
+        if self.load_shedder is not None and 'imgsz' in self.load_shedder.steps:
+            # imgsz asli diambil dari model baru, lalu tingkat degradasi saat ini diterapkan ulang.
+            self.normal_imgsz = None
+            self._apply_load_level()
+        self.logger.info("✅ Model baru aktif mulai batch berikutnya.")
+
+    def wait_for_model(self):
+        """Menunggu model selesai dimuat di thread latar belakang (langsung kembali jika sudah siap)."""
+        if self._model_future is not None:
+            self.model = self._model_future.result()
+            self._model_future = None
+            self.logger.info(f"🧠 Model siap {time.monotonic() - self.started_at:.2f} detik setelah inisialisasi.")
+        return self.model
+
+    def _open_cameras(self) -> list:
+        """
+        Membuka sumber video semua kamera secara paralel dan memulai thread capture.
+        Kamera yang gagal dibuka tetap aktif; thread capture-nya terus mencoba menyambung ulang.
+        """
+        if not self.cameras:
+            return []
+        # Membuka stream RTSP bisa memakan beberapa detik; semua kamera dibuka bersamaan.
+        with ThreadPoolExecutor(max_workers=len(self.cameras), thread_name_prefix="open-camera") as executor:
+            opened = list(executor.map(lambda cam: cam.grabber.start(), self.cameras))
+        for cam, ok in zip(self.cameras, opened):
+            if not ok:
+                self.logger.error(
+                    f"❌ [{cam.name}] Gagal membuka sumber video: {cam.source}. "
+                    f"Dicoba menyambung ulang setiap {cam.grabber.reconnect_delay_sec:g} detik.",
+                    extra={"event": "open_failed", "camera": cam.name},
+                )
+        self.logger.info(
+            f"📹 {sum(opened)}/{len(self.cameras)} stream terbuka {time.monotonic() - self.started_at:.2f} detik "
+            f"setelah inisialisasi."
+        )
+        return list(self.cameras)
+
+    def _collect_frames(self, cameras: list, timeout: float = 1.0) -> list:
+        """Mengumpulkan frame terbaru dari setiap kamera yang sudah memiliki frame baru."""
+        self.frame_event.wait(timeout)
+        self.frame_event.clear()
+        batch = []
+        for cam in cameras:
+            frame, captured_at = cam.grabber.read(timeout=0)
+            if frame is not None:
+                batch.append((cam, frame, captured_at))
+        return batch
+
+    def _detection_loop(self, cameras: list):
+        """Loop deteksi: kumpulkan frame, proses batch, dan catat statistik. Berhenti jika 'q' ditekan atau stop_event diset."""
+        stats_interval = self.config.get('capture', {}).get('stats_interval_sec', 30)
+        last_stats_time = time.monotonic()
+
+        while not self.stop_event.is_set():
+            # Jika belum ada frame baru (stream macet/reconnect), batch kosong; jendela tampilan tetap dilayani.
+            batch = self._collect_frames(cameras)
+            if batch:
+                self._process_batch(batch)
+            if self.load_shedder is not None and self.load_shedder.update(time.monotonic()):
+                self._apply_load_level()
+            self._check_config_reload()
+
+            if time.monotonic() - last_stats_time >= stats_interval:
+                for cam in cameras:
+                    cam.log_stats()
+                self._log_queue_stats()
+                if self.log_metrics_summary:
+                    self._log_stage_summary()
+                last_stats_time = time.monotonic()
+
+            if self.show_window and cv2.waitKey(1) & 0xFF == ord('q'):
+                self.logger.info("Tombol 'q' ditekan. Menghentikan program...")
+                return
+
+    def _process_batch(self, batch: list):
+        """Memproses frame terbaru dari setiap kamera: motion gate, ROI, inferensi batch, tracking, dan hasil deteksi."""
+        now = self.clock()
+        with self.stage_timer.measure("preprocess"):
+            if self.load_shedder is not None:
+                # Pengendali beban melewati sebagian frame setiap kamera (frame_skip); frame yang diproses tetap terbaru.
+                batch = [item for item in batch if not self.load_shedder.skip_frame(item[0].name)]
+            # Frame tanpa gerakan di ROI tidak ikut diinferensi (motion gate).
+            candidates = [item for item in batch if item[0].needs_inference(item[1], now)]
+            # Inferensi jarang: kamera yang belum jadwalnya dideteksi cukup memropagasi box track-nya.
+            inference_batch, propagation_batch = [], []
+            for item in candidates:
+                (inference_batch if item[0].needs_detection() else propagation_batch).append(item)
+            processing_frames = [cam.prepare_frame(frame) for cam, frame, _ in inference_batch]
+
+        tracks_by_camera = {}
+        if propagation_batch:
+            with self.stage_timer.measure("propagation"):
+                for cam, frame, _ in propagation_batch:
+                    tracks_by_camera[cam] = cam.propagate_tracks(frame)
+        if inference_batch:
+            for cam, _, captured_at in inference_batch:
+                # Umur frame = selisih waktu antara frame ditangkap dan mulai diinferensi.
+                frame_age = time.monotonic() - captured_at
+                cam.frame_ages.append(frame_age)
+                self.stage_timer.observe("frame_age_seconds", frame_age, camera=cam.name)
+
+            if self.inference_pool is not None:
+                # Inferensi dan tracking berjalan di worker process; hasilnya langsung berupa array track per kamera.
+                with self.stage_timer.measure("inference"):
+                    pool_tracks = self.inference_pool.infer(
+                        [(cam.name, frame) for (cam, _, _), frame in zip(inference_batch, processing_frames)]
+                    )
+                for cam, _, _ in inference_batch:
+                    tracks_by_camera[cam] = cam.to_frame_coords(pool_tracks.get(cam.name, EMPTY_TRACKS))
             else:
-                self.logger.error("Gagal membaca frame pertama untuk membuat ROI mask.")
+                # Satu panggilan inferensi untuk frame terbaru dari semua kamera.
+                with self.stage_timer.measure("inference"):
+                    batch_results = self.model.predict(processing_frames, verbose=False)
+
+                with self.stage_timer.measure("tracking"):
+                    for (cam, _, _), result in zip(inference_batch, batch_results):
+                        tracks_by_camera[cam] = cam.to_frame_coords(cam.tracker.update(result))
+
+            if not self._first_inference_logged:
+                self._first_inference_logged = True
+                self.logger.info(
+                    f"⚙️ Inferensi frame pertama selesai {time.monotonic() - self.started_at:.2f} detik setelah inisialisasi."
+                )
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                self.logger.warning(f"Frame kosong dari sumber {video_source}. Mencoba menyambung ulang dalam 5 detik...")
-                cap.release()
-                time.sleep(5)
-                cap = cv2.VideoCapture(video_source)
-                continue
+            for cam, frame, _ in inference_batch:
+                if cam.propagator is not None:
+                    # Hasil deteksi menjadi titik awal propagasi sampai deteksi berikutnya.
+                    cam.propagator.reset(frame, tracks_by_camera.get(cam, EMPTY_TRACKS))
 
-            # Buat salinan frame untuk ditampilkan dan digambari
-            display_frame = frame.copy()
+        for cam, frame, captured_at in batch:
+            tracks = tracks_by_camera.get(cam, EMPTY_TRACKS)
+            if cam.clip_recorder is not None:
+                # Frame asli masuk ke ring klip (dibatasi fps/resolusi); encoding dilakukan di thread perekam.
+                cam.clip_recorder.add_frame(frame, now)
+            # Hapus track yang sudah tidak terlihat melebihi disappearance_timeout_sec.
+            cam.tracked_persons.expire(self.clock())
 
-            if roi_mask is not None:
-                processing_frame = cv2.bitwise_and(frame, frame, mask=roi_mask)
-            else:
-                processing_frame = frame
+            # Buat salinan frame untuk ditampilkan dan digambari, hanya jika ada yang menonton.
+            has_viewers = self.preview is not None and self.preview.has_viewers(cam.name)
+            display_frame = frame.copy() if self.show_window or has_viewers else None
 
-            results = self.model.track(
-                processing_frame, persist=True, verbose=False, tracker="bytetrack.yaml"
-            )
-            
             # Kirim frame asli (frame) dan frame untuk display (display_frame)
-            self._process_detections(frame, display_frame, results)
+            with self.stage_timer.measure("process_detections"):
+                self._process_detections(cam, frame, display_frame, tracks)
+
+            if display_frame is not None:
+                with self.stage_timer.measure("render"):
+                    if cam.roi_points is not None:
+                        cv2.polylines(display_frame, [cam.roi_points], isClosed=True, color=(255, 255, 0), thickness=2)
+                    if self.show_window:
+                        cv2.imshow(f"{cam.name} - Real-Time Person Detection (Tekan 'q' untuk keluar)", display_frame)
+                    if has_viewers:
+                        self.preview.publish(cam.name, display_frame)
+            cam.mark_processed()
+            # Latensi end-to-end: sejak frame ditangkap sampai selesai diproses.
+            frame_latency = time.monotonic() - captured_at
+            self.stage_timer.record("frame_latency", frame_latency)
+            if self.load_shedder is not None:
+                self.load_shedder.record(frame_latency)
 
-            if self.roi_points is not None:
-                cv2.polylines(display_frame, [self.roi_points], isClosed=True, color=(255, 255, 0), thickness=2)
-
-            cv2.imshow("Real-Time Person Detection (Tekan 'q' untuk keluar)", display_frame)
+    def run(self):
+        """Loop utama untuk menangkap dan memproses stream video dari semua kamera dalam satu proses."""
+        # Model (thread pemuat atau worker pool) dimuat bersamaan dengan pembukaan stream.
+        if self.inference_pool is not None:
+            self.inference_pool.start()
+        cameras = self._open_cameras()
+        if not cameras:
+            self.logger.critical("❌ Tidak ada kamera di config.")
+            if self.inference_pool is not None:
+                self.inference_pool.stop()
+            return
+        try:
+            if self.inference_pool is not None:
+                self.inference_pool.wait_ready()
+            self.wait_for_model()
+        except Exception:
+            for cam in cameras:
+                cam.grabber.stop()
+            if self.inference_pool is not None:
+                self.inference_pool.stop()
+            raise
+            
+        self.logger.info("✅ Sumber video berhasil dibuka. Memulai deteksi...")
+        if not self.show_window:
+            self.logger.info("🖥️ Mode headless aktif. Tekan Ctrl+C untuk keluar.")
+        if self.preview is not None:
+            self.preview.start()
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+        if (self.config_watcher is not None and hasattr(signal, 'SIGHUP')
+                and threading.current_thread() is threading.main_thread()):
+            # 'kill -HUP <pid>' memuat ulang config tanpa menunggu interval pemeriksaan file.
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.config_watcher.request_reload())
+        for worker in self.notification_workers:
+            worker.start()
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                self.logger.info("Tombol 'q' ditekan. Menghentikan program...")
-                break
-        
-        cap.release()
-        cv2.destroyAllWindows()
-        self.executor.shutdown(wait=True)
+        try:
+            self._detection_loop(cameras)
+        except KeyboardInterrupt:
+            self.logger.info("Ctrl+C ditekan. Menghentikan program...")
+        except Exception as e:
+            # Error fatal (misalnya worker inferensi terus mati): resource tetap dilepas lalu error diteruskan.
+            self.logger.critical(f"❌ Loop deteksi berhenti karena error: {e}", exc_info=True)
+            self._shutdown(cameras)
+            raise
+        self._shutdown(cameras)
+
+    def _shutdown(self, cameras: list):
+        """Menghentikan server, stream, perekam, worker, dan antrian notifikasi."""
+        if self.preview is not None:
+            self.preview.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        for cam in cameras:
+            cam.grabber.stop()
+            if cam.clip_recorder is not None:
+                cam.clip_recorder.close()
+        if self.inference_pool is not None:
+            self.inference_pool.stop()
+        if self.show_window:
+            cv2.destroyAllWindows()
+        # Tutup antrian; worker menyelesaikan event yang tersisa sebelum berhenti.
+        self.event_queue.close()
+        for worker in self.notification_workers:
+            worker.join()
+        self.notifier.close()
         self.logger.info("👋 Sistem berhenti. Semua resource telah dilepaskan.")
 
 if __name__ == "__main__":
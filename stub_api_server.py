@@ -0,0 +1,128 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Server API Tiruan (stub) untuk Menguji Notifier
+
+# Menjalankan server HTTP lokal yang menerima semua POST (WhatsApp, log server) dan mencatat:
+# jumlah request per path, jumlah event log (termasuk isi batch), koneksi TCP baru, dan latensi penanganan.
+# Opsi --delay dan --fail-rate mensimulasikan API yang lambat atau sedang bermasalah;
+# --fail-status menentukan status balasan gagal (misalnya 400 untuk menguji penolakan permanen).
+# Statistik dapat dilihat di GET /stats atau dicetak saat server dihentikan (Ctrl+C).
+#
+# Contoh:
+#   python stub_api_server.py --port 9000 --delay 0.5 --fail-rate 0.2
+# lalu arahkan endpoint di config.yaml ke http://127.0.0.1:9000/whatsapp dan http://127.0.0.1:9000/log
+
+
+class StubStats:
+    """Penghitung request dan latensi server tiruan."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests_by_path = {}
+        self.failures = 0
+        self.events_received = 0
+        self.connections = 0
+        self.latencies = []
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000 if latencies else 0.0
+
+            return {
+                "requests": sum(self.requests_by_path.values()),
+                "requests_by_path": dict(self.requests_by_path),
+                "failures": self.failures,
+                "events_received": self.events_received,
+                "connections": self.connections,
+                "latency_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99)},
+            }
+
+
+def make_handler(stats: StubStats, delay: float, fail_rate: float, fail_status: int = 503):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, agar penggunaan ulang koneksi terlihat
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+
+        def do_POST(self):
+            started = time.monotonic()
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if delay:
+                time.sleep(delay)
+
+            events = 1
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                try:
+                    payload = json.loads(body)
+                    if isinstance(payload, dict) and isinstance(payload.get("events"), list):
+                        events = len(payload["events"])
+                except ValueError:
+                    pass
+
+            failed = random.random() < fail_rate
+            with stats.lock:
+                stats.requests_by_path[self.path] = stats.requests_by_path.get(self.path, 0) + 1
+                if failed:
+                    stats.failures += 1
+                else:
+                    stats.events_received += events
+                stats.latencies.append(time.monotonic() - started)
+            self._reply(fail_status if failed else 200, {"ok": not failed})
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, stats.snapshot())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def _reply(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server API tiruan untuk menguji pengiriman notifikasi.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--delay", type=float, default=0.0, help="Jeda (detik) sebelum membalas setiap request.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Peluang (0-1) membalas dengan status gagal.")
+    parser.add_argument("--fail-status", type=int, default=503,
+                        help="Status HTTP untuk balasan gagal (503 = dicoba ulang, 4xx = ditolak permanen).")
+    args = parser.parse_args()
+
+    stats = StubStats()
+    handler = make_handler(stats, args.delay, args.fail_rate, args.fail_status)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"Stub API berjalan di http://{args.host}:{args.port} (statistik: GET /stats). Tekan Ctrl+C untuk berhenti.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(stats.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import copy
+import os
+import sys
+
+import pytest
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def base_config(tmp_path):
+    """config.yaml bawaan dengan semua path data diarahkan ke direktori sementara."""
+    with open(os.path.join(ROOT, "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config = copy.deepcopy(config)
+    storage = config['storage']
+    storage['log_path'] = str(tmp_path / "logs" / "events.log")
+    for sink in ("captures", "framerecord", "clips"):
+        if sink in storage:
+            storage[sink]['path'] = str(tmp_path / sink)
+    if 'outbox' in storage:
+        storage['outbox']['path'] = str(tmp_path / "outbox.db")
+    jsonl_cfg = config.get('logging', {}).get('jsonl')
+    if jsonl_cfg is not None:
+        jsonl_cfg['path'] = str(tmp_path / "logs" / "jsonl" / "events.jsonl")
+    return config
+
+
+@pytest.fixture
+def stub_api():
+    """Menjalankan stub_api_server.py sebagai proses terpisah; mengembalikan fungsi start(*argumen CLI) -> URL dasar."""
+    import socket
+    import subprocess
+    import time
+
+    import requests
+
+    processes = []
+
+    def start(*args):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "stub_api_server.py"), "--port", str(port), *map(str, args)],
+            stdout=subprocess.DEVNULL,
+        )
+        processes.append(process)
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                requests.get(f"{base_url}/stats", timeout=1)
+                return base_url
+            except requests.ConnectionError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("stub_api_server.py gagal dijalankan.")
+                time.sleep(0.05)
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait(timeout=5)
@@ -0,0 +1,85 @@
+import copy
+
+import pytest
+import yaml
+
+import rtspv2
+from benchmark import StubModel
+from config_reload import ConfigWatcher, validate_config
+
+
+def _drop(config, *path):
+    target = config
+    for key in path[:-1]:
+        target = target[key]
+    del target[path[-1]]
+    return config
+
+
+BROKEN_CONFIGS = {
+    "tanpa cameras": lambda c: _drop(c, 'cameras'),
+    "tanpa processing.device": lambda c: _drop(c, 'processing', 'device'),
+    "tanpa processing.enable_roi": lambda c: _drop(c, 'processing', 'enable_roi'),
+    "tanpa storage.captures.save_crop": lambda c: _drop(c, 'storage', 'captures', 'save_crop'),
+    "tanpa api.api_key": lambda c: _drop(c, 'api', 'api_key'),
+    "confidence di luar rentang": lambda c: c['model'].update(confidence_threshold=1.5) or c,
+}
+
+
+@pytest.fixture
+def detector(tmp_path, base_config):
+    base_config['config_reload']['enabled'] = False
+    base_config['storage']['outbox']['enabled'] = False
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(base_config))
+    detector = rtspv2.RealTimeDetector(str(config_path), model=StubModel())
+    yield detector
+    detector.notifier.close(timeout=1)
+    rtspv2._stop_log_listener()
+
+
+def test_default_config_is_valid(base_config):
+    assert validate_config(base_config) == []
+
+
+@pytest.mark.parametrize("name", sorted(BROKEN_CONFIGS))
+def test_validate_rejects_config_that_cannot_be_applied(base_config, name):
+    assert validate_config(BROKEN_CONFIGS[name](base_config)) != []
+
+
+@pytest.mark.parametrize("name", sorted(BROKEN_CONFIGS))
+def test_watcher_rejects_broken_config_file(tmp_path, base_config, name):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(base_config))
+    watcher = ConfigWatcher(str(config_path), rtspv2.logging.getLogger("test"), interval_sec=0)
+    config_path.write_text(yaml.safe_dump(BROKEN_CONFIGS[name](copy.deepcopy(base_config))))
+    watcher.request_reload()
+    assert watcher.poll(0.0) is None
+    assert watcher.rejected == 1
+
+
+def test_failed_apply_keeps_old_config(detector):
+    old_config = detector.config
+    cam = detector.cameras[0]
+    old_roi_points = cam.roi_points
+
+    new_config = copy.deepcopy(old_config)
+    new_config['model']['confidence_threshold'] = 0.9
+    new_config['processing']['enable_roi'] = True
+    new_config['processing']['roi_points'] = [[0, 0], [10, "x"], [10, 10]]   # tidak bisa dijadikan array int
+    detector._apply_config(new_config)
+
+    assert detector.config is old_config
+    assert detector.confidence_threshold == old_config['model']['confidence_threshold']
+    assert cam.roi_points is old_roi_points
+
+
+def test_valid_config_is_applied(detector):
+    new_config = copy.deepcopy(detector.config)
+    new_config['model']['confidence_threshold'] = 0.9
+    new_config['tracking']['disappearance_timeout_sec'] = 7
+    detector._apply_config(new_config)
+
+    assert detector.config is new_config
+    assert detector.confidence_threshold == 0.9
+    assert all(cam.tracked_persons.timeout_sec == 7 for cam in detector.cameras)
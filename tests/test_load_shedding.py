@@ -0,0 +1,91 @@
+import logging
+import time
+
+from load_shedding import SHED_STEPS, LoadShedder
+
+logger = logging.getLogger("test-load-shedding")
+
+
+def _shedder(**kwargs):
+    options = {"target_latency_ms": 100.0, "window_sec": 1.0, "restore_ratio": 0.5, "hold_sec": 5.0}
+    options.update(kwargs)
+    return LoadShedder(logger, **options)
+
+
+def _window(shedder, now, latency_sec, count=20):
+    for _ in range(count):
+        shedder.record(latency_sec)
+    return shedder.update(now)
+
+
+def test_steps_up_one_level_per_slow_window():
+    shedder = _shedder()
+    start = time.monotonic()
+    assert _window(shedder, start + 1, 0.3)
+    assert shedder.mode() == "imgsz"
+    assert _window(shedder, start + 2, 0.3)
+    assert shedder.mode() == "imgsz+frame_skip"
+    assert shedder.active("frame_skip") and not shedder.active("framerecord")
+
+    for offset in range(3, 6):
+        _window(shedder, start + offset, 0.3)
+    # Semua langkah sudah aktif; tidak ada tingkat lebih tinggi.
+    assert shedder.level == len(SHED_STEPS)
+    assert not _window(shedder, start + 6, 0.3)
+    assert shedder.mode_changes == len(SHED_STEPS)
+
+
+def test_restore_waits_for_hold_and_low_latency():
+    shedder = _shedder()
+    start = time.monotonic()
+    _window(shedder, start + 1, 0.3)
+    _window(shedder, start + 2, 0.3)
+
+    # Latensi rendah, tetapi hold_sec sejak perubahan terakhir belum terpenuhi.
+    assert not _window(shedder, start + 3, 0.01)
+    # Di bawah target tetapi belum di bawah target * restore_ratio: tetap di tingkat yang sama.
+    assert not _window(shedder, start + 8, 0.08)
+    assert _window(shedder, start + 9, 0.01)
+    assert shedder.mode() == "imgsz"
+    # Langkah berikutnya juga menunggu hold_sec lagi.
+    assert not _window(shedder, start + 10, 0.01)
+    assert _window(shedder, start + 14, 0.01)
+    assert shedder.mode() == "normal"
+
+
+def test_update_waits_for_full_window():
+    shedder = _shedder()
+    start = time.monotonic()
+    shedder.record(0.3)
+    assert not shedder.update(start + 0.5)
+    assert shedder.level == 0
+    assert shedder.update(start + 1)
+    assert shedder.last_p95 > 0.1
+
+
+def test_empty_window_keeps_level():
+    shedder = _shedder()
+    start = time.monotonic()
+    _window(shedder, start + 1, 0.3)
+    assert not shedder.update(start + 10)
+    assert shedder.level == 1
+
+
+def test_frame_skip_is_counted_per_camera():
+    """Setiap kamera kehilangan porsi frame yang sama walaupun frame-nya datang berselang-seling."""
+    shedder = _shedder(steps=("frame_skip",), skip_frames=1)
+    assert not shedder.skip_frame("kamera-1")
+
+    _window(shedder, time.monotonic() + 1, 0.3)
+    processed = {"kamera-1": 0, "kamera-2": 0}
+    for _ in range(10):
+        for camera in ("kamera-2", "kamera-1", "kamera-1", "kamera-2"):
+            if not shedder.skip_frame(camera):
+                processed[camera] += 1
+    assert processed == {"kamera-1": 10, "kamera-2": 10}
+    assert shedder.frames_skipped == 20
+
+
+def test_unknown_steps_are_ignored():
+    shedder = _shedder(steps=("imgsz", "matikan_kamera", "jpeg_quality"))
+    assert shedder.steps == ("imgsz", "jpeg_quality")
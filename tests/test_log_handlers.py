@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rtspv2
+from log_handlers import build_file_handler
+
+
+def _touch_backups(directory, base_name, days):
+    paths = []
+    for day in days:
+        path = directory / f"{base_name}.2026-10-{day:02d}.gz"
+        path.write_bytes(b"")
+        paths.append(str(path))
+    return paths
+
+
+def test_time_rotation_only_deletes_own_backups(tmp_path):
+    """events.log dan events.jsonl di satu direktori tidak boleh saling menghapus backup."""
+    text_handler = build_file_handler(str(tmp_path / "events.log"), rotation="time", backup_count=3)
+    jsonl_handler = build_file_handler(str(tmp_path / "events.jsonl"), rotation="time", backup_count=3)
+    try:
+        text_backups = _touch_backups(tmp_path, "events.log", range(1, 6))
+        jsonl_backups = _touch_backups(tmp_path, "events.jsonl", range(1, 6))
+
+        # Hanya backup tertua milik handler itu sendiri yang melebihi backup_count.
+        assert sorted(text_handler.getFilesToDelete()) == text_backups[:2]
+        assert sorted(jsonl_handler.getFilesToDelete()) == jsonl_backups[:2]
+    finally:
+        text_handler.close()
+        jsonl_handler.close()
+
+
+def test_time_rotation_keeps_backups_under_limit(tmp_path):
+    handler = build_file_handler(str(tmp_path / "events.log"), rotation="time", backup_count=3)
+    try:
+        _touch_backups(tmp_path, "events.log", range(1, 3))
+        (tmp_path / "events.log.bukan-tanggal.gz").write_bytes(b"")
+        assert handler.getFilesToDelete() == []
+    finally:
+        handler.close()
+
+
+def test_exception_reaches_jsonl_through_queue(tmp_path):
+    """Traceback yang dicatat lewat QueueHandler/QueueListener ditulis di field 'exception', bukan di pesan."""
+    jsonl_path = tmp_path / "jsonl" / "events.jsonl"
+    logger = rtspv2.setup_logger(str(tmp_path / "events.log"), {"jsonl": {"enabled": True, "path": str(jsonl_path)}})
+    try:
+        try:
+            raise ValueError("frame rusak")
+        except ValueError:
+            logger.error("Gagal memproses frame", exc_info=True, extra={"event": "test", "camera": "kamera-1"})
+    finally:
+        rtspv2._stop_log_listener()
+
+    entries = [json.loads(line) for line in jsonl_path.read_text(encoding="utf-8").splitlines()]
+    entry = next(entry for entry in entries if entry.get("event") == "test")
+    assert entry["message"] == "Gagal memproses frame"
+    assert "ValueError: frame rusak" in entry["exception"]
+    assert entry["camera"] == "kamera-1"
+    # Log teks tetap menyertakan traceback.
+    assert "ValueError: frame rusak" in (tmp_path / "events.log").read_text(encoding="utf-8")
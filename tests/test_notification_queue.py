@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+import pytest
+
+from notification_queue import DetectionEvent, EventQueue
+
+FRAME = np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def _event(camera_name, track_id):
+    return DetectionEvent(camera_name, track_id, 0.9, FRAME)
+
+
+def test_drop_oldest_keeps_newest_events():
+    queue = EventQueue(maxsize=2, overflow_policy="drop_oldest")
+    for track_id in (1, 2, 3):
+        assert queue.put(_event("kamera-1", track_id))
+
+    assert [queue.get(timeout=0).track_id for _ in range(2)] == [2, 3]
+    stats = queue.stats()
+    assert stats["enqueued"] == 3
+    assert stats["dropped"] == 1
+    assert stats["max_depth"] == 2
+
+
+def test_drop_newest_rejects_incoming_event():
+    queue = EventQueue(maxsize=2, overflow_policy="drop_newest")
+    assert queue.put(_event("kamera-1", 1))
+    assert queue.put(_event("kamera-1", 2))
+    assert not queue.put(_event("kamera-1", 3))
+
+    assert [queue.get(timeout=0).track_id for _ in range(2)] == [1, 2]
+    assert queue.stats()["dropped"] == 1
+
+
+def test_coalesce_merges_with_pending_event_of_same_camera():
+    """Event baru menggantikan event tertunda terbaru dari kamera yang sama dan mewarisi posisinya di antrian."""
+    queue = EventQueue(maxsize=2, overflow_policy="coalesce")
+    queue.put(_event("kamera-1", 1))
+    queue.put(_event("kamera-2", 2))
+    assert queue.put(_event("kamera-1", 3))
+    assert queue.put(_event("kamera-1", 4))
+
+    first = queue.get(timeout=0)
+    assert first.track_id == 4
+    assert first.merged_track_ids == [1, 3]
+    assert queue.get(timeout=0).track_id == 2
+
+    stats = queue.stats()
+    assert stats["coalesced"] == 2
+    assert stats["dropped"] == 0
+    assert stats["enqueued"] == 2
+
+
+def test_coalesce_falls_back_to_drop_oldest_for_new_camera():
+    queue = EventQueue(maxsize=2, overflow_policy="coalesce")
+    queue.put(_event("kamera-1", 1))
+    queue.put(_event("kamera-2", 2))
+    assert queue.put(_event("kamera-3", 3))
+
+    assert [queue.get(timeout=0).camera_name for _ in range(2)] == ["kamera-2", "kamera-3"]
+    assert queue.stats()["dropped"] == 1
+
+
+def test_unknown_policy_uses_drop_oldest():
+    assert EventQueue(maxsize=1, overflow_policy="blokir").overflow_policy == "drop_oldest"
+
+
+def test_close_wakes_waiting_worker():
+    queue = EventQueue(maxsize=2)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(queue.get(timeout=10)))
+    worker.start()
+    queue.close()
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+    assert results == [None]
+    assert queue.closed
+
+
+@pytest.mark.parametrize("reset_wait", [True, False])
+def test_stats_wait_reset(reset_wait):
+    queue = EventQueue(maxsize=2)
+    queue.put(_event("kamera-1", 1))
+    queue.get(timeout=0)
+    assert queue.stats(reset_wait=reset_wait)["max_wait_sec"] >= 0.0
+    stats = queue.stats()
+    assert stats["depth"] == 0
+    if reset_wait:
+        assert stats["avg_wait_sec"] == 0.0 and stats["max_wait_sec"] == 0.0
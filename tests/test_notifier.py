@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+
+import requests
+
+from notifier import LOG_SERVICE, Notifier, RetryScheduler
+
+logger = logging.getLogger("test-notifier")
+
+
+def _api_cfg(base_url, batch_size=1, flush_interval_sec=2.0, retries=3):
+    return {
+        "api_key": "kunci-test",
+        "http": {"timeout_sec": 2, "retries": retries, "backoff_base_sec": 0.05, "pool_size": 2},
+        "log_server": {"enabled": True, "endpoint": f"{base_url}/log", "batch_size": batch_size,
+                       "flush_interval_sec": flush_interval_sec},
+    }
+
+
+def _server_stats(base_url):
+    return requests.get(f"{base_url}/stats", timeout=2).json()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_scheduler_runs_callbacks_in_due_order():
+    scheduler = RetryScheduler(logger)
+    calls = []
+    done = threading.Event()
+    try:
+        scheduler.call_later(0.15, lambda: (calls.append("lambat"), done.set()))
+        scheduler.call_later(0.05, lambda: calls.append("cepat"))
+        scheduler.call_later(0.0, lambda: calls.append("segera"))
+        assert done.wait(2)
+        assert calls == ["segera", "cepat", "lambat"]
+    finally:
+        scheduler.stop()
+
+
+def test_scheduler_survives_failing_callback(caplog):
+    """Callback yang melempar exception dicatat di log dan callback berikutnya tetap dijalankan."""
+    scheduler = RetryScheduler(logger)
+    done = threading.Event()
+
+    def broken():
+        raise RuntimeError("executor sudah ditutup")
+
+    try:
+        with caplog.at_level(logging.ERROR, logger="test-notifier"):
+            scheduler.call_later(0.0, broken)
+            scheduler.call_later(0.05, done.set)
+            assert done.wait(2)
+        assert "executor sudah ditutup" in caplog.text
+    finally:
+        scheduler.stop()
+
+
+def test_stop_discards_pending_callbacks():
+    scheduler = RetryScheduler(logger)
+    calls = []
+    scheduler.call_later(0.2, lambda: calls.append("terlambat"))
+    scheduler.stop()
+    time.sleep(0.3)
+    assert calls == []
+
+
+def test_log_events_sent_as_one_batch_when_full(stub_api):
+    base_url = stub_api()
+    notifier = Notifier(_api_cfg(base_url, batch_size=5, flush_interval_sec=30), logger)
+    try:
+        for index in range(5):
+            notifier.log_event({"track_id": index})
+        assert _wait_for(lambda: _server_stats(base_url)["events_received"] == 5)
+        assert _server_stats(base_url)["requests_by_path"] == {"/log": 1}
+    finally:
+        notifier.close(timeout=2)
+
+
+def test_partial_batch_sent_after_flush_interval(stub_api):
+    base_url = stub_api()
+    notifier = Notifier(_api_cfg(base_url, batch_size=10, flush_interval_sec=0.2), logger)
+    try:
+        notifier.log_event({"track_id": 1})
+        notifier.log_event({"track_id": 2})
+        assert _server_stats(base_url)["requests"] == 0
+        assert _wait_for(lambda: _server_stats(base_url)["events_received"] == 2)
+        assert _server_stats(base_url)["requests"] == 1
+    finally:
+        notifier.close(timeout=2)
+
+
+def test_batch_size_one_keeps_single_event_format(stub_api):
+    base_url = stub_api()
+    notifier = Notifier(_api_cfg(base_url, batch_size=1), logger)
+    try:
+        notifier.log_event({"track_id": 1})
+        notifier.log_event({"track_id": 2})
+        # Server menghitung request sebelum membalas; tunggu sampai Notifier mencatat hasilnya.
+        assert _wait_for(lambda: notifier.stats().get(LOG_SERVICE, {}).get("success") == 2)
+        assert _server_stats(base_url)["requests_by_path"] == {"/log": 2}
+    finally:
+        notifier.close(timeout=2)
+
+
+def test_failed_request_is_retried_then_given_up(stub_api):
+    """Server yang selalu gagal (503) dicoba sebanyak 'retries' lalu dicatat sebagai gagal total."""
+    base_url = stub_api("--fail-rate", 1.0)
+    notifier = Notifier(_api_cfg(base_url, retries=3), logger)
+    try:
+        notifier.send(f"{base_url}/whatsapp", "WhatsApp", json_data={"pesan": "tes"})
+        assert _wait_for(lambda: notifier.stats().get("WhatsApp", {}).get("failure") == 1)
+        stats = notifier.stats()["WhatsApp"]
+        assert stats["retries"] == 2
+        assert stats["success"] == 0
+        assert _server_stats(base_url)["failures"] == 3
+    finally:
+        notifier.close(timeout=2)
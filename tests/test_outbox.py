@@ -0,0 +1,165 @@
+import logging
+import time
+
+import requests
+
+from notifier import LOG_SERVICE, Notifier
+from outbox import Outbox
+
+logger = logging.getLogger("test-outbox")
+
+
+def _fill(outbox, count, service=LOG_SERVICE, url="http://127.0.0.1:1/log"):
+    return [outbox.append(service, url, json_data={"track_id": index}) for index in range(count)]
+
+
+def _api_cfg(base_url, batch_size=1):
+    return {
+        "api_key": "kunci-test",
+        "http": {"timeout_sec": 2, "retries": 3, "backoff_base_sec": 0.05, "max_backoff_sec": 0.2, "pool_size": 2},
+        "log_server": {"enabled": True, "endpoint": f"{base_url}/log", "batch_size": batch_size,
+                       "flush_interval_sec": 0.1},
+    }
+
+
+def _outbox_cfg(tmp_path):
+    return {"enabled": True, "path": str(tmp_path / "outbox.db"), "max_rows": 100, "max_mb": 1}
+
+
+def _server_stats(base_url):
+    return requests.get(f"{base_url}/stats", timeout=2).json()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_row_cap_drops_oldest(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), logger, max_rows=3)
+    try:
+        _fill(outbox, 5)
+        stats = outbox.stats()
+        assert stats["pending"] == 3
+        assert stats["dropped"] == 2
+        assert [item.payload["track_id"] for item in outbox.due(time.time())] == [2, 3, 4]
+    finally:
+        outbox.close()
+
+
+def test_size_cap_drops_oldest(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), logger, max_rows=100, max_mb=1)
+    try:
+        attachment = {"gambar": ("capture.jpg", b"\0" * 400 * 1024, "image/jpeg")}
+        for _ in range(4):
+            outbox.append("WhatsApp", "http://127.0.0.1:1/whatsapp", json_data={}, files=attachment)
+        stats = outbox.stats()
+        assert stats["pending"] == 2
+        assert stats["dropped"] == 2
+        assert stats["bytes"] <= 1024 * 1024
+    finally:
+        outbox.close()
+
+
+def test_reschedule_delays_item_and_counts_attempts(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), logger)
+    try:
+        _fill(outbox, 2)
+        first, second = outbox.due(time.time())
+        now = time.time()
+        outbox.reschedule([first], now + 60)
+
+        assert [item.id for item in outbox.due(now)] == [second.id]
+        assert outbox.next_due_in(now) == 0.0
+        (item,) = [item for item in outbox.due(now + 61) if item.id == first.id]
+        assert item.attempts == 1
+    finally:
+        outbox.close()
+
+
+def test_reject_and_delete_are_counted_once(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"), logger)
+    try:
+        _fill(outbox, 3)
+        first, second, third = outbox.due(time.time())
+        outbox.reject([first])
+        outbox.reject([first])
+        outbox.delete([second])
+        stats = outbox.stats()
+        assert (stats["pending"], stats["rejected"], stats["delivered"]) == (1, 1, 1)
+    finally:
+        outbox.close()
+
+
+def test_pending_items_survive_reopen(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path, logger)
+    keys = _fill(outbox, 2)
+    outbox.close()
+
+    outbox = Outbox(path, logger)
+    try:
+        assert outbox.stats()["pending"] == 2
+        assert [item.key for item in outbox.due(time.time())] == keys
+    finally:
+        outbox.close()
+
+
+def test_notifier_delivers_from_outbox(stub_api, tmp_path):
+    base_url = stub_api()
+    notifier = Notifier(_api_cfg(base_url), logger, _outbox_cfg(tmp_path))
+    try:
+        notifier.send(f"{base_url}/whatsapp", "WhatsApp", json_data={"pesan": "tes"})
+        notifier.log_event({"track_id": 1})
+        assert _wait_for(lambda: notifier.outbox.stats()["delivered"] == 2)
+        assert notifier.outbox.stats()["pending"] == 0
+        assert _server_stats(base_url)["requests_by_path"] == {"/whatsapp": 1, "/log": 1}
+    finally:
+        notifier.close(timeout=2)
+
+
+def test_notifier_keeps_retrying_failed_item(stub_api, tmp_path):
+    """Balasan 503 tidak membuang notifikasi: percobaan dijadwalkan ulang dan baris tetap ada setelah close()."""
+    base_url = stub_api("--fail-rate", 1.0)
+    notifier = Notifier(_api_cfg(base_url), logger, _outbox_cfg(tmp_path))
+    notifier.send(f"{base_url}/whatsapp", "WhatsApp", json_data={"pesan": "tes"})
+    try:
+        # Lebih banyak percobaan daripada 'retries': outbox tidak memiliki batas jumlah percobaan.
+        assert _wait_for(lambda: notifier.stats().get("WhatsApp", {}).get("retries", 0) >= 4)
+        assert notifier.outbox.stats()["pending"] == 1
+        assert notifier.outbox.stats()["rejected"] == 0
+    finally:
+        notifier.close(timeout=2)
+
+    outbox = Outbox(str(tmp_path / "outbox.db"), logger)
+    try:
+        (item,) = outbox.due(time.time() + 60)
+        assert item.attempts >= 4
+    finally:
+        outbox.close()
+
+
+def test_rejected_batch_is_split_and_dropped(stub_api, tmp_path):
+    """Batch yang ditolak (400) dikirim ulang per event; setiap event yang juga ditolak dihapus tanpa retry."""
+    base_url = stub_api("--fail-rate", 1.0, "--fail-status", 400)
+    # Event sudah berada di outbox sebelum pengirim berjalan (seperti setelah restart) sehingga dikirim satu batch.
+    outbox = Outbox(_outbox_cfg(tmp_path)["path"], logger)
+    _fill(outbox, 3, url=f"{base_url}/log")
+    outbox.close()
+
+    notifier = Notifier(_api_cfg(base_url, batch_size=3), logger, _outbox_cfg(tmp_path))
+    try:
+        assert _wait_for(lambda: notifier.outbox.stats()["rejected"] == 3)
+        stats = notifier.outbox.stats()
+        assert stats["pending"] == 0
+        assert stats["delivered"] == 0
+        assert notifier.stats()[LOG_SERVICE]["failure"] == 3
+        assert notifier.stats()[LOG_SERVICE]["retries"] == 0
+        # Satu request batch ditambah tiga request per event.
+        assert _server_stats(base_url)["requests"] == 4
+    finally:
+        notifier.close(timeout=2)
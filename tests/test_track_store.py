@@ -0,0 +1,54 @@
+from track_store import TrackStore
+
+
+def test_touch_keeps_first_seen_within_timeout():
+    store = TrackStore(timeout_sec=5.0)
+    record = store.touch(1, 100.0)
+    record.notified = True
+
+    again = store.touch(1, 104.0)
+    assert again is record
+    assert again.first_seen == 100.0
+    assert again.last_seen == 104.0
+    assert again.notified
+
+
+def test_expire_removes_only_stale_tracks():
+    """Hanya track yang tidak terlihat lebih lama dari timeout yang dihapus, walaupun urutan masuknya berbeda."""
+    store = TrackStore(timeout_sec=5.0)
+    store.touch(1, 100.0)
+    store.touch(2, 101.0)
+    store.touch(3, 102.0)
+    # Track 1 terlihat lagi sehingga pindah ke belakang urutan last_seen.
+    store.touch(1, 104.0)
+
+    assert store.expire(108.5) == 2
+    assert len(store) == 1
+    assert store.evictions == 2
+    assert store.expire(108.5) == 0
+
+    # Track yang sudah dihapus memulai jendela persistence baru.
+    record = store.touch(2, 109.0)
+    assert record.first_seen == 109.0
+    assert not record.notified
+
+
+def test_touch_after_timeout_resets_window_before_expire():
+    """Track yang kembali setelah timeout tetapi belum sempat di-expire() tetap dianggap orang baru."""
+    store = TrackStore(timeout_sec=5.0)
+    record = store.touch(7, 100.0)
+    record.notified = True
+
+    record = store.touch(7, 110.0)
+    assert record.first_seen == 110.0
+    assert not record.notified
+    assert store.evictions == 1
+    assert len(store) == 1
+
+
+def test_expire_at_exact_timeout_keeps_track():
+    store = TrackStore(timeout_sec=5.0)
+    store.touch(1, 100.0)
+    assert store.expire(105.0) == 0
+    assert store.expire(105.01) == 1
+    assert len(store) == 0
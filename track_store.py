@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+# Penyimpanan State Tracking (TrackStore)
+
+# Menggantikan defaultdict tracked_persons yang tidak pernah dibersihkan.
+# Setiap track_id disimpan sebagai TrackRecord ringkas (__slots__) di OrderedDict yang diurutkan
+# berdasarkan last_seen, sehingga entri yang kedaluwarsa selalu berada di depan dan dapat dihapus
+# dalam O(jumlah entri kedaluwarsa) tanpa memindai seluruh isi.
+# Entri dihapus setelah tidak terlihat selama 'disappearance_timeout_sec'; orang yang kembali
+# setelah itu memulai jendela persistence baru.
+
+
+class TrackRecord:
+    """Status satu track_id: kapan pertama/terakhir terlihat dan apakah sudah dinotifikasi."""
+
+    __slots__ = ("track_id", "first_seen", "last_seen", "notified")
+
+    def __init__(self, track_id: int, now: float):
+        self.track_id = track_id
+        self.first_seen = now
+        self.last_seen = now
+        self.notified = False
+
+
+class TrackStore:
+    """Penyimpanan tracked_persons yang terbatas dengan kedaluwarsa berdasarkan waktu terakhir terlihat."""
+
+    def __init__(self, timeout_sec: float):
+        self.timeout_sec = timeout_sec
+        self._records = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def touch(self, track_id: int, now: float) -> TrackRecord:
+        """Mencatat bahwa track_id terlihat pada waktu 'now' dan mengembalikan record-nya."""
+        record = self._records.get(track_id)
+        if record is None:
+            record = TrackRecord(track_id, now)
+            self._records[track_id] = record
+            return record
+
+        if now - record.last_seen > self.timeout_sec:
+            # Belum sempat dihapus oleh expire(), tetapi sudah hilang terlalu lama: mulai jendela baru.
+            self.evictions += 1
+            record.first_seen = now
+            record.notified = False
+        record.last_seen = now
+        self._records.move_to_end(track_id)
+        return record
+
+    def expire(self, now: float) -> int:
+        """Menghapus semua track yang tidak terlihat lebih lama dari timeout. Mengembalikan jumlah yang dihapus."""
+        cutoff = now - self.timeout_sec
+        expired = 0
+        while self._records:
+            oldest = next(iter(self._records.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            self._records.popitem(last=False)
+            expired += 1
+        self.evictions += expired
+        return expired
@@ -0,0 +1,38 @@
+import numpy as np
+import yaml
+
+# Tracking Per Kamera (CameraTracker)
+
+# Inferensi dijalankan sebagai satu batch untuk semua kamera (model.predict), sehingga tracker
+# bawaan model.track tidak bisa dipakai: untuk input non-stream Ultralytics hanya membuat satu tracker.
+# Setiap kamera memiliki instance BYTETracker sendiri agar ID tidak tercampur antar kamera.
+# Hasil dikembalikan sebagai satu array NumPy [x1, y1, x2, y2, track_id, conf, cls] per baris,
+# sehingga pemrosesan selanjutnya tidak perlu mengakses tensor box satu per satu.
+# ultralytics baru diimpor saat tracker pertama dibuat agar startup (dan proses utama pada mode pool) tetap ringan.
+
+EMPTY_TRACKS = np.zeros((0, 7), dtype=np.float32)
+
+
+class CameraTracker:
+    """Membungkus BYTETracker untuk satu kamera."""
+
+    def __init__(self, tracker_cfg: str = "bytetrack.yaml"):
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import IterableSimpleNamespace
+        from ultralytics.utils.checks import check_yaml
+
+        with open(check_yaml(tracker_cfg), 'r') as f:
+            cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+        self._tracker = BYTETracker(args=cfg)
+
+    def update(self, result) -> np.ndarray:
+        """Memperbarui tracker dengan hasil deteksi satu frame dan mengembalikan array track (N x 7)."""
+        # Satu kali transfer untuk semua box (xyxy, conf, cls) dari tensor ke NumPy.
+        det = result.boxes.cpu().numpy()
+        tracks = self._tracker.update(det, result.orig_img)
+        if len(tracks) == 0:
+            return EMPTY_TRACKS
+
+        # Kolom terakhir adalah indeks deteksi asal dan tidak diperlukan lagi.
+        return tracks[:, :-1]
+